@@ -0,0 +1,150 @@
+import sqlite3
+
+import pandas as pd
+
+# --- CONFIGURACIÓN ---
+FILE_DB = 'historico_conciliacion.sqlite'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS odoo_cuentas (
+    periodo TEXT NOT NULL, cuenta TEXT NOT NULL, descripcion TEXT, saldo REAL
+);
+CREATE TABLE IF NOT EXISTS coi_cuentas (
+    periodo TEXT NOT NULL, cuenta TEXT NOT NULL, descripcion TEXT, saldo REAL,
+    es_padre INTEGER, check_txt TEXT, grupo TEXT
+);
+CREATE TABLE IF NOT EXISTS conciliacion (
+    periodo TEXT NOT NULL, odoo_cta TEXT, odoo_desc TEXT, odoo_saldo REAL,
+    coi_cta TEXT, coi_desc TEXT, coi_saldo REAL, diff REAL, status TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_odoo_cuenta ON odoo_cuentas (cuenta, periodo);
+CREATE INDEX IF NOT EXISTS ix_odoo_periodo ON odoo_cuentas (periodo);
+CREATE INDEX IF NOT EXISTS ix_coi_cuenta ON coi_cuentas (cuenta, periodo);
+CREATE INDEX IF NOT EXISTS ix_coi_periodo ON coi_cuentas (periodo);
+CREATE INDEX IF NOT EXISTS ix_conc_odoo ON conciliacion (odoo_cta, periodo);
+CREATE INDEX IF NOT EXISTS ix_conc_coi ON conciliacion (coi_cta, periodo);
+CREATE INDEX IF NOT EXISTS ix_conc_status ON conciliacion (status, periodo);
+CREATE INDEX IF NOT EXISTS ix_conc_periodo ON conciliacion (periodo);
+"""
+
+
+def conectar(ruta_db=FILE_DB):
+    conn = sqlite3.connect(ruta_db)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(ESQUEMA)
+    return conn
+
+def _texto(serie):
+    return serie.fillna('').astype(str).str.strip()
+
+def _numero(serie):
+    return pd.to_numeric(serie, errors='coerce').astype(object).where(lambda s: s.notna(), None)
+
+def _dados(**kwargs):
+    # Solo los argumentos dados; el resto toma el default de la etapa
+    return {k: v for k, v in kwargs.items() if v is not None}
+
+def _filas_odoo(df):
+    """Renglones de Reporte_Contable_Final (DataFrame de procesar_contabilidad o ruta al Excel)."""
+    if isinstance(df, str): df = pd.read_excel(df, engine='openpyxl')
+    df = df[_texto(df['Cuenta']) != '']
+    return list(zip(_texto(df['Cuenta']), _texto(df['Descripcion']), _numero(df['Saldo'])))
+
+def _filas_coi(df):
+    """Cuentas del COI limpio (df_clean de procesar_coi_final o ruta a COI_Final_SumaCorrecta)."""
+    from clean_coi import obtener_nombre_rubro
+    if isinstance(df, str): df = pd.read_excel(df, engine='openpyxl')
+    df = df[_texto(df['Cuenta']) != '']
+    cuenta, check = _texto(df['Cuenta']), _texto(df['Check'])
+    # Como en el Excel: solo los padres llevan check y el grupo es el rubro de la cuenta
+    es_padre = (check != '').astype(int)
+    return list(zip(
+        cuenta, _texto(df['Descripcion']), _numero(df['Saldo']),
+        es_padre, check, cuenta.map(obtener_nombre_rubro)
+    ))
+
+def _filas_conciliacion(df):
+    from variacion_periodos import cargar_conciliacion
+    df = cargar_conciliacion(df)
+    return list(zip(
+        df['Odoo_Cta'], df['Odoo_Desc'], _numero(df['Odoo_Saldo']),
+        df['COI_Cta'], df['COI_Desc'], _numero(df['COI_Saldo']), _numero(df['Diff']), df['Status']
+    ))
+
+def cargar_periodo(periodo, odoo=None, coi=None, conciliacion=None, ruta_db=FILE_DB):
+    """
+    Guarda un periodo ('AAAA-MM') en SQLite. Cada fuente puede ser el DataFrame que regresa
+    su etapa o la ruta a su Excel. Volver a cargar un periodo reemplaza sus renglones.
+    """
+    tablas = [
+        ('odoo_cuentas', odoo, _filas_odoo, 3),
+        ('coi_cuentas', coi, _filas_coi, 6),
+        ('conciliacion', conciliacion, _filas_conciliacion, 8),
+    ]
+    conn = conectar(ruta_db)
+    try:
+        with conn:  # una sola transacción por periodo
+            for tabla, fuente, a_filas, n_cols in tablas:
+                if fuente is None: continue
+                filas = a_filas(fuente)
+                conn.execute(f"DELETE FROM {tabla} WHERE periodo = ?", (periodo,))
+                conn.executemany(
+                    f"INSERT INTO {tabla} VALUES (?{', ?' * n_cols})",
+                    [(periodo, *f) for f in filas]
+                )
+                print(f"  {tabla}: {len(filas)} renglones ({periodo})")
+    finally:
+        conn.close()
+
+def registrar_cierre(periodo, ruta_libro, ruta_aux, ruta_db=FILE_DB,
+                     salida_odoo=None, salida_coi=None, salida_conciliacion=None, ruta_tipos_cambio=None):
+    """
+    Corre las tres etapas del cierre sobre los archivos de `periodo` y guarda sus resultados.
+    Las entradas son obligatorias (los defaults de los módulos son los de diciembre); las salidas
+    que no se den usan el nombre default de cada etapa.
+    """
+    from libro_mayor_plano import procesar_contabilidad
+    from clean_coi import procesar_coi_final
+    from conciliacion_coi import generar_analisis_v18_7
+
+    # La conciliación lee exactamente lo que escribieron las dos primeras etapas
+    odoo = procesar_contabilidad(ruta=ruta_libro, **_dados(salida=salida_odoo))
+    coi = procesar_coi_final(ruta=ruta_aux, **_dados(salida=salida_coi))
+
+    # Una etapa que falla regresa None; seguir conciliaría los reportes viejos que estén en disco
+    if odoo is None or coi is None:
+        raise RuntimeError(f"Falló {'Odoo' if odoo is None else 'COI'}: no se guarda el periodo {periodo}")
+    conciliacion = generar_analisis_v18_7(**_dados(
+        ruta_odoo=salida_odoo, ruta_coi=salida_coi, salida=salida_conciliacion, ruta_tipos_cambio=ruta_tipos_cambio
+    ))
+    if conciliacion is None:
+        raise RuntimeError(f"Falló la conciliación: no se guarda el periodo {periodo}")
+    print(f"--- Guardando periodo {periodo} en {ruta_db} ---")
+    cargar_periodo(periodo, odoo, coi, conciliacion, ruta_db)
+
+
+# --- CONSULTAS ---
+def consultar(sql, params=(), ruta_db=FILE_DB):
+    conn = conectar(ruta_db)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+def historial_cuenta(cuenta, ruta_db=FILE_DB):
+    """Saldo Odoo/COI y estatus de una cuenta (Odoo o COI) en todos los periodos cargados."""
+    return consultar(
+        "SELECT periodo, odoo_cta, coi_cta, odoo_saldo, coi_saldo, diff, status FROM conciliacion "
+        "WHERE odoo_cta = ? OR coi_cta = ? ORDER BY periodo",
+        (cuenta, cuenta), ruta_db
+    )
+
+def periodos_con_estatus(prefijo, status="DIFERENCIA", ruta_db=FILE_DB):
+    """Renglones cuya cuenta COI empieza con `prefijo` (p.ej. '1150') y tuvieron `status`."""
+    patron = ''.join(f"[{c}]" if c in '*?[' else c for c in prefijo) + '*'
+    return consultar(
+        "SELECT periodo, odoo_cta, coi_cta, odoo_saldo, coi_saldo, diff, status FROM conciliacion "
+        "WHERE status = ? AND coi_cta GLOB ? ORDER BY periodo, coi_cta",
+        (status, patron), ruta_db
+    )
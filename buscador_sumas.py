@@ -0,0 +1,196 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from conciliacion_coi import FILE_OUTPUT as FILE_CONCILIACION, COI_TO_ODOO_SECTION, normalize_code, safe_write_money
+from variacion_periodos import cargar_conciliacion
+
+# --- CONFIGURACIÓN ---
+FILE_OUTPUT = 'Sumas_Virtuales_Propuestas.xlsx'
+TOLERANCIA = 0.1          # Misma tolerancia que el estatus OK de la conciliación
+MAX_COMPONENTES = 4       # Subconjuntos de hasta 4 huérfanas (pares contra pares)
+MAX_SOLUCIONES = 5        # Alternativas reportadas por renglón Odoo
+MAX_HUERFANAS_SECCION = 600  # Cota para la tabla de pares (n^2/2 sumas)
+SALDO_MINIMO = 1.0        # Saldos Odoo menores son ruido de redondeo, no se buscan
+# Con cientos de huérfanas, 3-4 componentes dentro de la tolerancia salen por azar:
+# esas propuestas se reportan como confianza BAJA y no se imprimen listas para pegar
+MAX_COMPONENTES_CONFIABLE = 2
+
+
+def conflictos_jerarquia(cuentas):
+    """Matriz n x n: True si una cuenta es ancestro de la otra (1150-004-000 vs 1150-004-305)."""
+    cuentas = [str(c).strip().upper() for c in cuentas]
+    bases = [re.sub(r'^(.*?)(?:-?000)+$', r'\1', c) + '-' for c in cuentas]
+    conflicto = np.array([[a != b and b.startswith(base) for b in cuentas] for a, base in zip(cuentas, bases)], dtype=bool)
+    return conflicto | conflicto.T
+
+def conflictos_odoo(cuentas):
+    """Matriz n x n: True si un renglón Odoo agrupa al otro (301 vs 301.01 vs 301.01.01)."""
+    cuentas = [str(c).strip() for c in cuentas]
+    conflicto = np.array([[b.startswith(a + '.') for b in cuentas] for a in cuentas], dtype=bool)
+    return conflicto | conflicto.T
+
+def buscar_subconjuntos(valores, objetivo, tolerancia, max_componentes=MAX_COMPONENTES, max_soluciones=MAX_SOLUCIONES,
+                        conflicto=None):
+    """
+    Subconjuntos de `valores` (enteros, en centavos) cuya suma cae en objetivo ± tolerancia.
+    Meet-in-the-middle: tabla ordenada de sumas de pares y búsqueda binaria, así que
+    tamaño 3 = individual + par y tamaño 4 = par + par. Regresa tuplas de índices
+    del menor tamaño con solución, la más cercana al objetivo primero.
+    `conflicto` (matriz n x n) marca índices que no pueden ir juntos (padre e hija contarían doble).
+    """
+    v = np.asarray(valores, dtype=np.int64)
+    n = len(v)
+    if n == 0: return []
+    if conflicto is None: conflicto = np.zeros((n, n), dtype=bool)
+    compatible = lambda idx: not conflicto[np.ix_(idx, idx)].any()
+
+    orden = np.argsort(v, kind='stable'); s1 = v[orden]
+    if n >= 2:
+        pi, pj = np.triu_indices(n, 1)
+        ok = ~conflicto[pi, pj]
+        pi, pj = pi[ok], pj[ok]
+        ps = v[pi] + v[pj]
+        o2 = np.argsort(ps, kind='stable')
+        pi, pj, ps = pi[o2], pj[o2], ps[o2]
+    else:
+        pi = pj = ps = np.empty(0, dtype=np.int64)
+
+    def rangos(tabla, centros):
+        return np.searchsorted(tabla, centros - tolerancia, 'left'), np.searchsorted(tabla, centros + tolerancia, 'right')
+
+    for tam in range(1, max_componentes + 1):
+        sols = set()
+        if tam == 1:
+            lo, hi = rangos(s1, np.array([objetivo]))
+            sols.update((int(orden[k]),) for k in range(lo[0], hi[0]))
+        elif tam == 2:
+            lo, hi = rangos(ps, np.array([objetivo]))
+            sols.update((int(pi[k]), int(pj[k])) for k in range(lo[0], hi[0]))
+        elif tam == 3:
+            lo, hi = rangos(ps, objetivo - v)
+            for k in np.flatnonzero(hi > lo):
+                for q in range(lo[k], hi[k]):
+                    if k != pi[q] and k != pj[q] and compatible([k, pi[q], pj[q]]):
+                        sols.add(tuple(sorted((int(k), int(pi[q]), int(pj[q])))))
+                        if len(sols) >= max_soluciones: break
+                if len(sols) >= max_soluciones: break
+        elif tam == 4:
+            lo, hi = rangos(ps, objetivo - ps)
+            for p in np.flatnonzero(hi > lo):
+                for q in range(max(lo[p], p + 1), hi[p]):
+                    c = {pi[p], pj[p], pi[q], pj[q]}
+                    if len(c) == 4 and compatible(list(c)):
+                        sols.add(tuple(sorted(int(x) for x in c)))
+                        if len(sols) >= max_soluciones: break
+                if len(sols) >= max_soluciones: break
+        if sols:
+            return sorted(sols, key=lambda sol: (abs(int(v[list(sol)].sum()) - objetivo), sol))[:max_soluciones]
+    return []
+
+def proponer_sumas_virtuales(conciliacion=FILE_CONCILIACION):
+    """
+    Por sección ancla (COI_TO_ODOO_SECTION) busca grupos de huérfanas COI ("NO EN ELISA")
+    cuya suma iguala un renglón Odoo sin contraparte ("NO EN COI").
+    Las huérfanas usadas en una propuesta ya no participan en las siguientes, y una propuesta
+    nunca junta una cuenta con su propia padre/hija (el mismo saldo contaría dos veces).
+    Del lado Odoo pasa lo mismo: si un renglón recibe propuesta, sus agrupadores y sub-renglones
+    (301 / 301.01 / 301.01.01) ya no se buscan.
+    """
+    df = cargar_conciliacion(conciliacion)
+
+    huerfanas = df[(df['Status'] == "NO EN ELISA") & ~df['COI_Cta'].str.upper().str.startswith("SUMA")].copy()
+    huerfanas['Seccion'] = huerfanas['COI_Cta'].map(lambda c: COI_TO_ODOO_SECTION.get(normalize_code(c)[:4]))
+    huerfanas['Centavos'] = (huerfanas['COI_Saldo'].fillna(0) * 100).round().astype(np.int64)
+    huerfanas = huerfanas[huerfanas['Seccion'].notna() & (huerfanas['Centavos'] != 0)]
+
+    odoo = df[df['Status'].str.startswith("NO EN COI") & (df['Odoo_Cta'] != '')].copy()
+    odoo['Seccion'] = odoo['Odoo_Cta'].str[:3]
+    odoo = odoo[odoo['Odoo_Saldo'].abs() >= SALDO_MINIMO]
+
+    tol = int(round(TOLERANCIA * 100))
+    propuestas = []
+    for seccion, grupo_h in huerfanas.groupby('Seccion'):
+        objetivos = odoo[odoo['Seccion'] == seccion]
+        if objetivos.empty: continue
+        if len(grupo_h) > MAX_HUERFANAS_SECCION:
+            print(f"Aviso: sección {seccion} con {len(grupo_h)} huérfanas; se usan las {MAX_HUERFANAS_SECCION} de mayor saldo")
+            grupo_h = grupo_h.loc[grupo_h['Centavos'].abs().nlargest(MAX_HUERFANAS_SECCION).index]
+
+        disponibles = np.ones(len(grupo_h), dtype=bool)
+        ctas, descs = grupo_h['COI_Cta'].to_numpy(), grupo_h['COI_Desc'].to_numpy()
+        cents, saldos = grupo_h['Centavos'].to_numpy(), grupo_h['COI_Saldo'].to_numpy()
+        conflicto = conflictos_jerarquia(ctas)
+
+        # Primero los saldos grandes: son los menos propensos a coincidencias fortuitas
+        objetivos = objetivos.loc[objetivos['Odoo_Saldo'].abs().sort_values(ascending=False).index]
+        conflicto_o = conflictos_odoo(objetivos['Odoo_Cta'])
+        bloqueados = np.zeros(len(objetivos), dtype=bool)
+        for k, o in enumerate(objetivos.to_dict('records')):
+            if bloqueados[k]: continue
+            idx_disp = np.flatnonzero(disponibles)
+            meta = int(round(abs(o['Odoo_Saldo']) * 100))
+            # La conciliación compara valores absolutos: el grupo puede sumar +meta o -meta
+            sub = conflicto[np.ix_(idx_disp, idx_disp)]
+            sols = (buscar_subconjuntos(cents[idx_disp], meta, tol, conflicto=sub) or
+                    buscar_subconjuntos(cents[idx_disp], -meta, tol, conflicto=sub))
+            if not sols: continue
+
+            elegida = idx_disp[list(sols[0])]
+            disponibles[elegida] = False
+            bloqueados |= conflicto_o[k]
+            suma = float(saldos[elegida].sum())
+            propuestas.append({
+                'Seccion': seccion, 'Odoo_Cta': o['Odoo_Cta'], 'Odoo_Desc': o['Odoo_Desc'], 'Odoo_Saldo': o['Odoo_Saldo'],
+                'Clave_Virtual': f"SUMA-AUTO-{o['Odoo_Cta']}", 'Componentes': list(ctas[elegida]),
+                'Descripciones': list(descs[elegida]), 'Suma_COI': suma,
+                'Diferencia': abs(o['Odoo_Saldo']) - abs(suma), 'Alternativas': len(sols) - 1,
+                'N_Componentes': len(elegida), 'Huerfanas_Seccion': len(grupo_h),
+                'Confianza': "ALTA" if len(elegida) <= MAX_COMPONENTES_CONFIABLE and len(sols) == 1 else "BAJA"
+            })
+
+    return pd.DataFrame(propuestas, columns=[
+        'Seccion', 'Odoo_Cta', 'Odoo_Desc', 'Odoo_Saldo', 'Clave_Virtual', 'Componentes',
+        'Descripciones', 'Suma_COI', 'Diferencia', 'Alternativas', 'N_Componentes', 'Huerfanas_Seccion', 'Confianza'
+    ])
+
+def generar_reporte_sumas(conciliacion=FILE_CONCILIACION):
+    print(f"--- Buscando sumas virtuales en huérfanas de {conciliacion if isinstance(conciliacion, str) else 'memoria'} ---")
+    df = proponer_sumas_virtuales(conciliacion)
+    print(f"Propuestas encontradas: {len(df)}")
+
+    writer = pd.ExcelWriter(FILE_OUTPUT, engine='xlsxwriter')
+    wb, ws = writer.book, writer.book.add_worksheet('Propuestas')
+    f_hdr = wb.add_format({'bg_color': '#D9D9D9', 'bold': True, 'border': 1, 'align': 'center'})
+    f_std = wb.add_format({'border': 1, 'text_wrap': True, 'valign': 'top'})
+    f_m = wb.add_format({'border': 1, 'num_format': '$ #,##0.00', 'valign': 'top'})
+    f_amb = wb.add_format({'border': 1, 'bg_color': '#F5CC27', 'bold': True, 'valign': 'top'})
+
+    for c, h in enumerate(['Odoo Cta', 'Odoo Desc', 'Odoo Saldo', 'Clave Virtual', 'Componentes COI', 'Suma COI', 'Diff',
+                           'Alternativas', 'N Comp.', 'Huérfanas Sección', 'Confianza']):
+        ws.write(0, c, h, f_hdr)
+    for i, r in enumerate(df.to_dict('records')):
+        row_idx = i + 1
+        ws.write(row_idx, 0, r['Odoo_Cta'], f_std); ws.write(row_idx, 1, r['Odoo_Desc'], f_std)
+        safe_write_money(ws, row_idx, 2, r['Odoo_Saldo'], f_m); ws.write(row_idx, 3, r['Clave_Virtual'], f_std)
+        ws.write(row_idx, 4, "\n".join(f"{c} {d}" for c, d in zip(r['Componentes'], r['Descripciones'])), f_std)
+        safe_write_money(ws, row_idx, 5, r['Suma_COI'], f_m); safe_write_money(ws, row_idx, 6, r['Diferencia'], f_m)
+        ws.write(row_idx, 7, r['Alternativas'], f_amb if r['Alternativas'] else f_std)
+        ws.write(row_idx, 8, r['N_Componentes'], f_std); ws.write(row_idx, 9, r['Huerfanas_Seccion'], f_std)
+        ws.write(row_idx, 10, r['Confianza'], f_amb if r['Confianza'] == "BAJA" else f_std)
+    ws.set_column('A:A', 15); ws.set_column('B:B', 40); ws.set_column('C:D', 22); ws.set_column('E:E', 50); ws.set_column('F:K', 15)
+    writer.close()
+
+    # Listo para pegar en VIRTUAL_COI_SUMS / HEADER_MAP (solo confianza ALTA)
+    for r in df.to_dict('records'):
+        if r['Confianza'] == "ALTA":
+            print(f"    '{r['Clave_Virtual']}': {r['Componentes']},   # Odoo {r['Odoo_Cta']}")
+        else:
+            print(f"    # REVISAR (confianza baja, {r['N_Componentes']} de {r['Huerfanas_Seccion']} huérfanas): "
+                  f"Odoo {r['Odoo_Cta']} ~ {' + '.join(r['Componentes'])}")
+    print(f"¡Listo! Propuestas generadas: {FILE_OUTPUT}")
+    return df
+
+if __name__ == "__main__":
+    generar_reporte_sumas()
@@ -1,9 +1,17 @@
+import os
 import pandas as pd
 import numpy as np
 import re
+import itertools
+
+from lectura_bloques import iterar_bloques, AcumuladorCuentas
+from procedencia import IndiceProcedencia, ruta_indice
 
 # --- CONFIGURACIÓN ---
 FILE_PATH = 'aux_coi_dic.xlsx' 
+FILE_OUTPUT = 'COI_Final_SumaCorrecta.xlsx'
+MODO_BLOQUES = False  # True: lee el auxiliar por bloques (archivos anuales muy grandes)
+MOTOR = 'pandas'      # 'pandas' | 'polars' (requiere polars; ver motor_polars.py)
 
 def obtener_nombre_rubro(cuenta_str: str) -> str:
     c = str(cuenta_str or "").strip()
@@ -102,79 +110,98 @@ def limpiar_descripcion(texto):
     if txt.lower() == 'nan': return ""
     return txt
 
-def procesar_coi_final():
-    print(f"--- Procesando COI: Suma Nacionales (001 + 004) ---")
-    
-    try:
-        df = pd.read_excel(FILE_PATH, header=None, engine='openpyxl')
-    except Exception as e:
-        print(f"Error crítico: {e}")
-        return
-
-    # 1. ENCONTRAR COLUMNA SALDO
-    saldo_col_idx = -1
+def detectar_columna_saldo(df):
+    """Índice de la columna 'Saldo' (final, no 'Saldo inicial') buscando en los primeros renglones."""
     for i in range(min(20, len(df))):
         row_vals = [str(x) for x in df.iloc[i].tolist()]
         candidates = [idx for idx, val in enumerate(row_vals) if "Saldo" in val and "inicial" not in val]
         if candidates:
-            saldo_col_idx = candidates[-1]
-            break
-    if saldo_col_idx == -1: saldo_col_idx = df.shape[1] - 1
-
-    # 2. EXTRAER CUENTAS
-    raw_cuentas = []
+            return candidates[-1]
+    return df.shape[1] - 1
+
+def extraer_cuentas(filas, saldo_col_idx):
+    """
+    Recorre las filas del auxiliar (tuplas) y produce una cuenta por cada bloque 'Cuenta : ...'.
+    Funciona igual sobre el DataFrame completo o sobre un flujo de bloques.
+    'Fila_Origen' es la posición (0-based) del renglón 'Cuenta : ...' dentro de `filas`.
+    """
     cuenta_actual = None
     desc_actual = None
     saldo_actual = 0.0
+    movimientos = 0
+    pos_actual = None
     en_bloque = False
     patron = re.compile(r"Cuenta\s*:\s*([\d-]+)\s+(.*)")
 
-    for index, row in df.iterrows():
-        fila_txt = " ".join([str(x) for x in row.iloc[:3] if pd.notna(x)])
+    for pos, row in enumerate(filas):
+        fila_txt = " ".join([str(x) for x in row[:3] if pd.notna(x)])
         match = patron.search(fila_txt)
         
         if match:
             # Guardar anterior
             if cuenta_actual:
-                raw_cuentas.append({
+                yield {
                     'Cuenta': cuenta_actual,
                     'Descripcion': desc_actual.strip(),
-                    'Saldo': saldo_actual
-                })
+                    'Saldo': saldo_actual,
+                    'Movimientos': movimientos,
+                    'Fila_Origen': pos_actual
+                }
             
             # Nueva
             cuenta_actual = match.group(1).strip()
             desc_actual = match.group(2).strip()
             saldo_actual = 0.0
+            movimientos = 0
+            pos_actual = pos
             en_bloque = True
             
             # Saldo en línea de título (Madres)
             if saldo_col_idx < len(row):
-                val = row.iloc[saldo_col_idx]
+                val = row[saldo_col_idx]
                 num = limpiar_saldo(val)
                 if num is not None: saldo_actual = num
             continue
         
         # Saldo en movimientos (Hijas)
         if en_bloque and saldo_col_idx < len(row):
-            val = row.iloc[saldo_col_idx]
+            val = row[saldo_col_idx]
             num = limpiar_saldo(val)
             if num is not None:
                 if isinstance(val, str) and ("Saldo" in val or "Haber" in val): continue
                 saldo_actual = num
+                movimientos += 1
 
     if cuenta_actual:
-        raw_cuentas.append({
+        yield {
             'Cuenta': cuenta_actual,
             'Descripcion': desc_actual.strip(),
-            'Saldo': saldo_actual
-        })
-
-    df_clean = pd.DataFrame(raw_cuentas)
-    if df_clean.empty: 
-        print("Error: No se encontraron cuentas.")
-        return
-
+            'Saldo': saldo_actual,
+            'Movimientos': movimientos,
+            'Fila_Origen': pos_actual
+        }
+
+def cargar_cuentas_por_bloques(ruta=FILE_PATH):
+    """
+    Versión por bloques: el auxiliar nunca se materializa completo.
+    Las cuentas se acumulan en AcumuladorCuentas (que desborda a disco si hace falta).
+    """
+    bloques = iterar_bloques(ruta)
+    primero = next(bloques, [])
+    saldo_col_idx = detectar_columna_saldo(pd.DataFrame(primero[:20]))
+    filas = itertools.chain(primero, itertools.chain.from_iterable(bloques))
+
+    acumulador = AcumuladorCuentas()
+    try:
+        for c in extraer_cuentas(filas, saldo_col_idx):
+            acumulador.registrar(c['Cuenta'], descripcion=c['Descripcion'], saldo=c['Saldo'], movimientos=c['Movimientos'])
+        df = acumulador.a_dataframe()
+    finally:
+        acumulador.cerrar()
+    return df.drop(columns='Orden').to_dict('records')
+
+def marcar_jerarquia(df_clean):
+    """Pasos 3 y 4: hojas vs padres y check de cada padre contra la suma de sus hojas."""
     # --- 3. JERARQUÍA ESTRICTA (Detectar Hojas vs Padres) ---
     def get_clean_base(cta):
         base = cta
@@ -217,6 +244,57 @@ def procesar_coi_final():
         return f"DIF: {diff:,.2f}"
 
     df_clean['Check'] = df_clean.apply(calcular_check, axis=1)
+    return df_clean
+
+def procesar_coi_final(por_bloques=MODO_BLOQUES, motor=MOTOR, ruta=FILE_PATH, salida=FILE_OUTPUT):
+    if motor not in ('pandas', 'polars'):
+        raise ValueError(f"Motor desconocido: {motor!r} (usar 'pandas' o 'polars')")
+    print(f"--- Procesando COI: Suma Nacionales (001 + 004) ---")
+    
+    indice = None
+    if motor == 'polars':
+        # Pasos 1-4 como plan lazy de Polars (ver motor_polars.py)
+        try:
+            from motor_polars import limpiar_coi_polars
+            df_clean = limpiar_coi_polars(ruta)
+        except Exception as e:
+            print(f"Error crítico: {e}")
+            return
+        if df_clean.empty: 
+            print("Error: No se encontraron cuentas.")
+            return
+    else:
+        if por_bloques:
+            try:
+                raw_cuentas = cargar_cuentas_por_bloques(ruta)
+            except Exception as e:
+                print(f"Error crítico: {e}")
+                return
+        else:
+            try:
+                df = pd.read_excel(ruta, header=None, engine='openpyxl')
+            except Exception as e:
+                print(f"Error crítico: {e}")
+                return
+
+            # 1. ENCONTRAR COLUMNA SALDO
+            saldo_col_idx = detectar_columna_saldo(df)
+
+            # 2. EXTRAER CUENTAS
+            raw_cuentas = list(extraer_cuentas(df.itertuples(index=False, name=None), saldo_col_idx))
+
+        df_clean = pd.DataFrame(raw_cuentas)
+        if df_clean.empty: 
+            print("Error: No se encontraron cuentas.")
+            return
+
+        # Procedencia (solo modo completo: el modo por bloques no conserva los renglones crudos)
+        if not por_bloques:
+            indice = IndiceProcedencia.desde_posiciones(
+                ruta, df, df_clean['Fila_Origen'], df_clean['Cuenta'], fila_base=1
+            )
+
+        df_clean = marcar_jerarquia(df_clean)
 
     # --- 5. EXPORTAR EXCEL ---
     df_clean['Grupo'] = df_clean['Cuenta'].apply(obtener_nombre_rubro)
@@ -265,7 +343,7 @@ def procesar_coi_final():
 
     df_export = pd.DataFrame(filas_excel)
 
-    nombre_archivo = 'COI_Final_SumaCorrecta.xlsx'
+    nombre_archivo = salida
     writer = pd.ExcelWriter(nombre_archivo, engine='xlsxwriter')
     
     df_export[['Cuenta', 'Descripcion', 'Saldo', 'Check']].to_excel(writer, index=False, sheet_name='Reporte')
@@ -305,7 +383,11 @@ def procesar_coi_final():
     ws.set_column('D:D', 15)
     
     writer.close()
+
+    if indice is not None: indice.guardar(ruta_indice(nombre_archivo))
+    elif os.path.exists(ruta_indice(nombre_archivo)): os.remove(ruta_indice(nombre_archivo))
     print(f"¡Listo! Archivo con suma unificada generado: {nombre_archivo}")
+    return df_clean
 
 if __name__ == "__main__":
     procesar_coi_final()
\ No newline at end of file
@@ -0,0 +1,170 @@
+import argparse
+import os
+import sys
+
+from mapeos import CHECK_ABUELAS_LIST, HEADER_MAP, COI_TO_ODOO_SECTION, VIRTUAL_COI_SUMS, MAJOR_NAME_MAP, normalize_code
+
+# --- CONFIGURACIÓN ---
+# Solo para los comandos ligeros (lookup / validate); mismos nombres que producen las etapas.
+# Las etapas pesadas usan los defaults de su propio módulo si no se pasa ruta.
+FILE_ODOO = 'Reporte_Contable_Final.xlsx'
+FILE_COI = 'COI_Final_SumaCorrecta.xlsx'
+
+# Uso:
+#   python cli.py flatten --entrada libro_mayor_ene.xlsx --salida Reporte_Ene.xlsx
+#   python cli.py clean --entrada aux_coi_ene.xlsx --motor polars
+#   python cli.py reconcile --odoo Reporte_Ene.xlsx --coi COI_Ene.xlsx --salida Analisis_Ene.xlsx
+#   python cli.py lookup 1150-002-000
+#   python cli.py validate --coi COI_Ene.xlsx --odoo Reporte_Ene.xlsx
+#   python cli.py mappings header
+#
+# pandas / numpy / xlsxwriter solo se importan dentro de flatten, clean y reconcile;
+# lookup y validate leen los reportes con openpyxl en modo read_only.
+
+
+# --- LECTURA LIGERA ---
+def cuentas_de_reporte(ruta):
+    """(Cuenta, Descripcion, Saldo) de las columnas A-C de un reporte generado, sin pandas."""
+    import openpyxl
+    wb = openpyxl.load_workbook(ruta, read_only=True)
+    try:
+        for fila in wb.worksheets[0].iter_rows(min_row=2, max_col=3, values_only=True):
+            cta = str(fila[0] or '').strip()
+            if cta: yield cta, fila[1], fila[2]
+    finally:
+        wb.close()
+
+def _kwargs(args, *nombres):
+    # Solo se pasan las rutas/opciones dadas; el resto toma el default del módulo
+    return {n: getattr(args, n) for n in nombres if getattr(args, n) is not None}
+
+
+# --- COMANDOS PESADOS ---
+def cmd_flatten(args):
+    from libro_mayor_plano import procesar_contabilidad
+    return procesar_contabilidad(**_kwargs(args, 'ruta', 'salida', 'motor', 'por_bloques')) is not None
+
+def cmd_clean(args):
+    from clean_coi import procesar_coi_final
+    return procesar_coi_final(**_kwargs(args, 'ruta', 'salida', 'motor', 'por_bloques')) is not None
+
+def cmd_reconcile(args):
+    from conciliacion_coi import generar_analisis_v18_7
+    return generar_analisis_v18_7(**_kwargs(args, 'ruta_odoo', 'ruta_coi', 'salida', 'ruta_tipos_cambio')) is not None
+
+
+# --- COMANDOS LIGEROS ---
+def cmd_lookup(args):
+    cta = args.cuenta.strip()
+    norm = normalize_code(cta)
+    abuelas = {normalize_code(x) for x in CHECK_ABUELAS_LIST}
+
+    print(f"--- Cuenta {cta} ---")
+    if cta in MAJOR_NAME_MAP: print(f"  Rubro Odoo:        {MAJOR_NAME_MAP[cta]}")
+    if cta in HEADER_MAP: print(f"  HEADER_MAP:        Odoo {cta} -> COI {HEADER_MAP[cta]}")
+    for odoo, coi in HEADER_MAP.items():
+        if normalize_code(coi) == norm: print(f"  HEADER_MAP:        Odoo {odoo} -> COI {coi}")
+    for clave, comps in VIRTUAL_COI_SUMS.items():
+        if normalize_code(clave) == norm: print(f"  Suma virtual:      {' + '.join(comps)}")
+        elif norm in {normalize_code(c) for c in comps}: print(f"  Componente de:     {clave}")
+    if norm[:4] in COI_TO_ODOO_SECTION: print(f"  Sección Odoo:      {COI_TO_ODOO_SECTION[norm[:4]]}")
+    if norm in abuelas: print("  Check Abuelas:     sí")
+
+    for sistema, ruta, igual in [('Odoo', args.odoo, lambda c: c == cta), ('COI', args.coi, lambda c: normalize_code(c) == norm)]:
+        if not os.path.exists(ruta):
+            print(f"  {'Saldo ' + sistema + ':':<19}(no existe {ruta})")
+            continue
+        encontrada = next(((c, d, s) for c, d, s in cuentas_de_reporte(ruta) if igual(c)), None)
+        if encontrada is None:
+            print(f"  {'Saldo ' + sistema + ':':<19}no aparece en {ruta}")
+        else:
+            c, d, s = encontrada
+            saldo = f"{s:,.2f}" if isinstance(s, (int, float)) else s
+            print(f"  {'Saldo ' + sistema + ':':<19}{saldo}  ({c} {d})")
+    return True
+
+def cmd_validate(args):
+    """Claves de HEADER_MAP, sumas virtuales y abuelas que no existen en los reportes."""
+    print(f"--- Validando mapeos contra {args.coi} ---")
+    try:
+        coi = {normalize_code(c) for c, _, _ in cuentas_de_reporte(args.coi)}
+    except Exception as e:
+        print(f"Error crítico: {e}")
+        return False
+    virtuales = {normalize_code(k) for k in VIRTUAL_COI_SUMS}
+    existe = lambda c: normalize_code(c) in coi or normalize_code(c) in virtuales
+
+    problemas = []
+    problemas += [f"HEADER_MAP: Odoo {o} -> COI {c} no existe en el COI" for o, c in HEADER_MAP.items() if not existe(c)]
+    problemas += [f"VIRTUAL_COI_SUMS: {k} usa {c}, que no existe en el COI"
+                  for k, comps in VIRTUAL_COI_SUMS.items() for c in comps if normalize_code(c) not in coi]
+    problemas += [f"CHECK_ABUELAS_LIST: {c} no existe en el COI" for c in CHECK_ABUELAS_LIST if not existe(c)]
+
+    if args.odoo:
+        print(f"--- Validando claves Odoo contra {args.odoo} ---")
+        try:
+            odoo = {c for c, _, _ in cuentas_de_reporte(args.odoo)}
+        except Exception as e:
+            print(f"Error crítico: {e}")
+            return False
+        problemas += [f"HEADER_MAP: Odoo {o} no existe en el reporte Odoo" for o in HEADER_MAP if o not in odoo]
+
+    for p in problemas: print(f"  {p}")
+    print(f"Mapeos revisados: {len(HEADER_MAP)} HEADER_MAP, {len(VIRTUAL_COI_SUMS)} sumas, "
+          f"{len(CHECK_ABUELAS_LIST)} abuelas | Problemas: {len(problemas)}")
+    return not problemas
+
+def cmd_mappings(args):
+    mapeos = {
+        'header': HEADER_MAP, 'secciones': COI_TO_ODOO_SECTION, 'nombres': MAJOR_NAME_MAP,
+        'sumas': {k: ' + '.join(v) for k, v in VIRTUAL_COI_SUMS.items()},
+        'abuelas': {c: '' for c in CHECK_ABUELAS_LIST},
+    }
+    for k, v in mapeos[args.mapeo].items():
+        print(f"{k:<28} {v}")
+    return True
+
+
+# --- ENTRADA ---
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Cierre Odoo vs COI: aplanar, limpiar, conciliar y consultar mapeos")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    for nombre, fn, ayuda in [('flatten', cmd_flatten, "Aplana el libro mayor de Odoo (libro_mayor_plano)"),
+                              ('clean', cmd_clean, "Limpia el auxiliar del COI (clean_coi)")]:
+        p = sub.add_parser(nombre, help=ayuda)
+        p.add_argument('--entrada', dest='ruta', help="Archivo de entrada (default: el del módulo)")
+        p.add_argument('--salida', help="Reporte a generar (default: el del módulo)")
+        p.add_argument('--motor', choices=['pandas', 'polars'])
+        p.add_argument('--bloques', dest='por_bloques', action='store_true', default=None, help="Lectura por bloques")
+        p.set_defaults(fn=fn)
+
+    p = sub.add_parser('reconcile', help="Concilia Odoo vs COI (conciliacion_coi)")
+    p.add_argument('--odoo', dest='ruta_odoo', help="Reporte Odoo aplanado")
+    p.add_argument('--coi', dest='ruta_coi', help="Reporte COI limpio")
+    p.add_argument('--salida', help="Análisis a generar")
+    p.add_argument('--tipos-cambio', dest='ruta_tipos_cambio', help="Tabla de tipos de cambio (CSV)")
+    p.set_defaults(fn=cmd_reconcile)
+
+    p = sub.add_parser('lookup', help="Mapeos y saldos de una cuenta Odoo o COI")
+    p.add_argument('cuenta')
+    p.add_argument('--odoo', default=FILE_ODOO, help="Reporte Odoo aplanado")
+    p.add_argument('--coi', default=FILE_COI, help="Reporte COI limpio")
+    p.set_defaults(fn=cmd_lookup)
+
+    p = sub.add_parser('validate', help="Valida HEADER_MAP, sumas virtuales y abuelas contra un COI limpio")
+    p.add_argument('--coi', default=FILE_COI, help="Reporte COI limpio")
+    p.add_argument('--odoo', help="Reporte Odoo aplanado (opcional: valida también las claves Odoo)")
+    p.set_defaults(fn=cmd_validate)
+
+    p = sub.add_parser('mappings', help="Lista un mapeo")
+    p.add_argument('mapeo', choices=['header', 'secciones', 'sumas', 'abuelas', 'nombres'])
+    p.set_defaults(fn=cmd_mappings)
+    return parser
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    return 0 if args.fn(args) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,74 +2,18 @@ import pandas as pd
 import numpy as np
 import re
 import math
+import os
+
+from procedencia import IndiceProcedencia, ruta_indice
+from tipos_cambio import FILE_TIPOS_CAMBIO, saldos_divisa_odoo, valuar_moneda_extranjera
+from mapeos import CHECK_ABUELAS_LIST, HEADER_MAP, COI_TO_ODOO_SECTION, VIRTUAL_COI_SUMS, normalize_code
 
 # --- CONFIGURACIÓN ---
 FILE_ODOO = 'Reporte_Contable_Final.xlsx'
 FILE_COI = 'COI_Final_SumaCorrecta.xlsx'
 FILE_OUTPUT = 'Analisis_Comparativo_Diciembre_V18_7.xlsx'
 
-# --- 1. DICCIONARIO DE CONTROL PARA CHECK ABUELAS ---
-CHECK_ABUELAS_LIST = [
-    '1110-000-000', '1120-000-000', '1121-000-000', '1122-000-000',
-    '1140-000-000', '1150-000-000', '1170-000-000', '1180-000-000',
-    '1190-000-000', '1200-000-000', '1201-000-000', '1215-000-000',
-    '1310-006-000','1360-000-000','1360-002-000', '2150-000-000', '2160-000-000',
-    '2170-000-000','2180-000-000', '1310-004-000', '2130-000-000', '4100-000-000',
-    '6200-000-000','7200-000-000',
-    '2110-000-000', '2120-000-000', '2190-000-000', 'SUMA-BANCOS-TOTAL',
-    'SUMA-CLIENTES-NACIONALES', 'SUMA-CLIENTES-EXTRANJEROS'
-]
-
-# --- 2. MAPA MAESTRO ---
-HEADER_MAP = {
-    '101': '1110-000-000', '102': 'SUMA-BANCOS-TOTAL', '102.01': '1120-000-000', 
-    '102.02.01':'1121-001-000',
-    '102.02':'SUMA-BANCOS-USD','105.01.00':'1150-001-000', '102.02.02':'1122-000-000',
-    '104': '1140-000-000',
-    '105': '1150-000-000', '105.01': 'SUMA-CLIENTES-NACIONALES', '105.02': 'SUMA-CLIENTES-EXTRANJEROS',
-    '107': '1170-000-000', '107.02': '1170-002-000','109': '1210-000-000', '113': '1180-000-000', 
-    '115': '1190-000-000', '118': '1200-000-000', '119': '1201-000-000', '154':'1310-003-000','155':'1310-005-000',
-    '120': '1215-000-000', '120.02.01':'1215-002-000','114': '1220-000-000', '153': '1310-006-000',
-    '156':'1310-004-000', '160':'1310-007-000', 
-    '171': '1360-000-000',  '171.03': '1360-002-000','201': '2110-000-000', '201.01':'2110-001-000',
-    '201.03.01':'2115-000-000', '205.02.06' :'2120-001-013', 
-    '205': '2120-000-000', '205.02': '2120-001-000','205.02.01':'2120-001-001','201.01.01':'2110-001-001',
-    '205.02.09':'2120-001-019', 
-    '206': '2190-000-000', '206.01.01': '2190-001-000', '213': '2140-000-000', '216': '2150-000-000', 
-    '210': '2160-000-000', '211': '2170-000-000', '208': '2180-000-000', 
-    '209': '2181-000-000', '251': '2130-000-000', '401': '4100-000-000', '401.04.01':'4100-002-000',
-    '402': '4200-000-000', '402.02.01':'4200-002-000','501': '5000-000-000',  '501.08':'5100-000-000', '501.08.08':'5200-000-000','602': '6100-000-000', 
-    '603': '6200-000-000', '603.82': '6200-055-000', '604.59': '6200-034-000',
-    '702': '7100-000-000', '701': '7200-000-000',  '701.05': '7200-005-000',
-    '704': '7300-000-000', '703': '7400-000-000'
-}
-
-COI_TO_ODOO_SECTION = {
-    '1110': '101', '1120': '102', '1140': '104', '1150': '105', '1170': '107',
-    '1180': '113', '1190': '115', '1191': '115', '1192': '115','2180':'205',
-    '2120':'205', '2115':'205', '2181':'205', '2190':'205', '2160':'205',
-    '1200': '118', '1201': '119', '1210': '109', '1215': '120', '1220': '114',
-    '1310': '153', '1360': '171', '2110': '201', '2130': '251', '1460':'183',
-    '4100': '401', '4200': '402', '5000': '501', '5100': '501', '5200': '501',
-    '6100': '602', '6200': '603', '7100': '702', '7200': '701', '7300': '704', '7400': '703'
-}
-
-# --- 3. SUMAS VIRTUALES ---
-VIRTUAL_COI_SUMS = {
-    'SUMA-BANCOS-TOTAL': ['1120-000-000', '1121-000-000', '1122-000-000'],
-    'SUMA-BANCOS-USD': ['1121-001-000', '1122-000-000'],
-    'SUMA-CLIENTES-NACIONALES': ['1150-001-000', '1150-004-000', '1150-005-000', '1150-006-000'],
-    'SUMA-CLIENTES-EXTRANJEROS': ['1150-002-000', '1150-003-000'],
-    'SUMA-PROVEEDORES-NACIONALES': ['1150-002-000', '2115-000-000']
-}
-
 # --- HELPERS ---
-def normalize_code(code):
-    if not code or pd.isna(code): return ""
-    s = str(code).upper().strip()
-    if s.startswith("SUMA-") or s.startswith("COI-"): return s
-    return s.replace('.', '').replace('-', '')
-
 def extract_key(desc):
     if not desc or pd.isna(desc): return None
     match = re.search(r'(\d{4}[-\.]\d{3}[-\.]\d{3})', str(desc))
@@ -81,9 +25,11 @@ def clean_money(val):
     try: return float(str(val).replace('$','').replace(',','').replace(' ',''))
     except: return 0.0
 
+ABUELAS_NORM = {normalize_code(x) for x in CHECK_ABUELAS_LIST}
+
 def is_abuela_format(key):
     if not key: return False
-    return normalize_code(key) in [normalize_code(x) for x in CHECK_ABUELAS_LIST]
+    return normalize_code(key) in ABUELAS_NORM
 
 def safe_write_money(ws, row, col, val, fmt):
     if val is None or pd.isna(val) or (isinstance(val, float) and (math.isnan(val) or math.isinf(val))):
@@ -91,23 +37,58 @@ def safe_write_money(ws, row, col, val, fmt):
     else:
         ws.write(row, col, float(val), fmt)
 
-# --- PROCESO ---
-def generar_analisis_v18_7():
-    print("--- Ejecutando Versión 18.7: Ajuste de Sumas Virtuales y Estatus Estructural ---")
-    df_odoo = pd.read_excel(FILE_ODOO, engine='openpyxl').fillna('')
-    df_coi = pd.read_excel(FILE_COI, engine='openpyxl').fillna('')
+def cargar_coi_lookup(ruta=FILE_COI):
+    """Lee el COI limpio y arma {cuenta normalizada: datos}, incluyendo las sumas virtuales."""
+    df_coi = pd.read_excel(ruta, engine='openpyxl').fillna('')
 
     df_coi['Saldo'] = df_coi['Saldo'].apply(clean_money)
     df_coi['Cuenta'] = df_coi['Cuenta'].astype(str).str.strip()
     
     coi_lookup = {}
-    for _, r in df_coi[df_coi['Cuenta'] != ''].iterrows():
-        norm = normalize_code(r['Cuenta'])
-        coi_lookup[norm] = {'Cuenta_Orig': r['Cuenta'], 'Descripcion': r['Descripcion'], 'Saldo': r['Saldo']}
+    df_ctas = df_coi[df_coi['Cuenta'] != '']
+    for cta, desc, saldo in zip(df_ctas['Cuenta'], df_ctas['Descripcion'], df_ctas['Saldo']):
+        coi_lookup[normalize_code(cta)] = {'Cuenta_Orig': cta, 'Descripcion': desc, 'Saldo': saldo}
 
     for v_key, comps in VIRTUAL_COI_SUMS.items():
         total = sum((coi_lookup.get(normalize_code(c), {}).get('Saldo', 0.0)) for c in comps)
         coi_lookup[normalize_code(v_key)] = {'Cuenta_Orig': v_key, 'Descripcion': f"GRUPO {v_key}", 'Saldo': total}
+    return coi_lookup
+
+def construir_arbol_coi(coi_lookup):
+    """
+    Valida todo el catálogo COI (XXXX-YYY-ZZZ) en una sola agregación:
+      - Abuela XXXX-000-000: se compara contra la suma de sus XXXX-YYY-000.
+      - Padre  XXXX-YYY-000: se compara contra la suma de sus XXXX-YYY-ZZZ.
+    Regresa un DataFrame indexado por cuenta normalizada (solo cuentas con hijas).
+    """
+    df = pd.DataFrame(
+        [(k, v['Cuenta_Orig'], v['Descripcion'], v['Saldo'] or 0.0) for k, v in coi_lookup.items()],
+        columns=['Norm', 'Cuenta', 'Descripcion', 'Saldo']
+    )
+    df = df[df['Norm'].str.fullmatch(r'\d{10}')]
+
+    rubro, sub, det = df['Norm'].str[:4], df['Norm'].str[4:7], df['Norm'].str[7:]
+    df['Padre'] = np.where(
+        det != '000', rubro + sub + '000',
+        np.where(sub != '000', rubro + '000000', None)
+    )
+
+    hijos = df.dropna(subset=['Padre']).groupby('Padre')['Saldo'].agg(['sum', 'count'])
+    hijos.columns = ['Suma_Hijos', 'Hijos']
+
+    arbol = df.set_index('Norm')[['Cuenta', 'Descripcion', 'Saldo']].join(hijos, how='inner')
+    arbol['Nivel'] = np.where(arbol.index.str[4:] == '000000', 'ABUELA', 'PADRE')
+    arbol['Diff'] = arbol['Suma_Hijos'] - arbol['Saldo']
+    arbol['Check'] = [("OK" if abs(d) < 0.1 else f"ERR: {d:,.2f}") for d in arbol['Diff']]
+    return arbol
+
+# --- PROCESO ---
+def generar_analisis_v18_7(ruta_odoo=FILE_ODOO, ruta_coi=FILE_COI, salida=FILE_OUTPUT,
+                           ruta_tipos_cambio=FILE_TIPOS_CAMBIO):
+    print("--- Ejecutando Versión 18.7: Ajuste de Sumas Virtuales y Estatus Estructural ---")
+    df_odoo = pd.read_excel(ruta_odoo, engine='openpyxl').fillna('')
+    coi_lookup = cargar_coi_lookup(ruta_coi)
+    checks_arbol = construir_arbol_coi(coi_lookup)['Check'].to_dict()
 
     coi_restante = {k: v['Saldo'] for k, v in coi_lookup.items()}
     df_odoo['Saldo_L'] = df_odoo['Saldo'].apply(clean_money)
@@ -170,7 +151,24 @@ def generar_analisis_v18_7():
                 })
 
     df_fin = pd.DataFrame(rows_final).sort_values('Orden')
-    writer = pd.ExcelWriter(FILE_OUTPUT, engine='xlsxwriter')
+
+    # Procedencia: hoja y filas de origen de cada lado (si los parsers dejaron su índice)
+    for prefijo, ruta, col in [('Odoo', ruta_odoo, 'Odoo_Cta'), ('COI', ruta_coi, 'COI_Cta')]:
+        indice = IndiceProcedencia.cargar(ruta_indice(ruta))
+        if indice is not None:
+            df_fin = df_fin.join(indice.anotar(df_fin[col], prefijo))
+
+    # Moneda extranjera: con tabla de tipos de cambio, las diferencias solo cambiarias quedan "OK (TC)"
+    # (saldos en moneda original iguales; ver tipos_cambio.py)
+    df_me = None
+    if os.path.exists(ruta_tipos_cambio):
+        df_me = valuar_moneda_extranjera(df_fin, saldos_divisa_odoo(ruta_odoo), ruta_tipos_cambio)
+        if not df_me.empty:
+            solo_tc = df_me.index[(df_me['Status_ME'] == "SOLO TC") & (df_me['Status'] == "DIFERENCIA")]
+            df_fin.loc[solo_tc, 'Status'] = "OK (TC)"
+            df_me.loc[solo_tc, 'Status'] = "OK (TC)"
+
+    writer = pd.ExcelWriter(salida, engine='xlsxwriter')
     wb, ws = writer.book, writer.book.add_worksheet('Conciliacion')
     
     def get_set(bg, bold=False):
@@ -193,7 +191,7 @@ def generar_analisis_v18_7():
         is_ab = is_abuela_format(cta_coi)
 
         if "NO EN COI" in st or st == "NO EN ELISA": fr, fm = f_audit_r, f_audit_m
-        elif is_h or is_ab: fr, fm = (f_ok_r, f_ok_m) if st == "OK" else (f_bad_r, f_bad_m)
+        elif is_h or is_ab: fr, fm = (f_ok_r, f_ok_m) if st.startswith("OK") else (f_bad_r, f_bad_m)
         else: fr, fm = f_std_r, f_std_m
         
         ws.write(row_idx, 0, r['Odoo_Cta'], fr); ws.write(row_idx, 1, r['Odoo_Desc'], fr)
@@ -202,19 +200,47 @@ def generar_analisis_v18_7():
         safe_write_money(ws, row_idx, 5, r['COI_Saldo'], fm)
         safe_write_money(ws, row_idx, 6, r['Diff'], fm); ws.write(row_idx, 7, st, fr)
 
-        if is_ab:
-            n_ab = normalize_code(cta_coi)
-            if "SUMA" in n_ab:
-                ws.write(row_idx, 8, "OK (SUMA)", f_i_ok)
-            else:
-                prefix = n_ab[:4]
-                sal_ab = (coi_lookup.get(n_ab, {}).get('Saldo', 0.0))
-                sum_h = sum((v['Saldo'] or 0.0) for k, v in coi_lookup.items() if k.startswith(prefix) and k != n_ab and k.endswith('000') and not k.startswith("SUMA"))
-                if abs(sum_h - sal_ab) < 0.1: ws.write(row_idx, 8, "OK", f_i_ok)
-                else: ws.write(row_idx, 8, f"ERR: {sum_h-sal_ab:,.2f}", f_ab_error)
-
-    ws.set_column('B:B', 50); ws.set_column('E:E', 40); ws.set_column('C:I', 15); writer.close()
+        # Check Abuelas: toda abuela/padre del árbol COI, no solo las de la lista
+        n_ab = normalize_code(cta_coi)
+        if is_ab and "SUMA" in n_ab:
+            ws.write(row_idx, 8, "OK (SUMA)", f_i_ok)
+        elif n_ab in checks_arbol:
+            chk = checks_arbol[n_ab]
+            ws.write(row_idx, 8, chk, f_i_ok if chk == "OK" else f_ab_error)
+
+    ws.set_column('B:B', 50); ws.set_column('E:E', 40); ws.set_column('C:I', 15)
+
+    # Procedencia en hoja aparte, renglón por renglón igual que Conciliacion (la hoja principal no cambia)
+    cols_proc = [c for c in df_fin.columns if c.split('_', 1)[-1] in ('Hoja', 'Fila_Ini', 'Fila_Fin')]
+    if cols_proc:
+        ws_p = wb.add_worksheet('Procedencia')
+        cols_p = ['Odoo_Cta', 'COI_Cta', 'Status'] + cols_proc
+        for c, col in enumerate(cols_p):
+            ws_p.write(0, c, col.replace('Status', 'Estatus').replace('_', ' '), f_hdr)
+        for i, r in enumerate(df_fin[cols_p].astype(object).where(df_fin[cols_p].notna(), '').to_dict('records')):
+            for c, col in enumerate(cols_p):
+                ws_p.write(i + 1, c, r[col], f_std_r)
+        ws_p.set_column('A:B', 18); ws_p.set_column('C:C', 25); ws_p.set_column(3, len(cols_p) - 1, 12)
+
+    if df_me is not None and not df_me.empty:
+        ws_me = wb.add_worksheet('Moneda_Extranjera')
+        cols_me = [('Odoo_Cta', 'Odoo Cta'), ('COI_Cta', 'COI Cta'), ('Moneda', 'Moneda'),
+                   ('Odoo_Saldo_ME', 'Odoo Saldo ME'), ('Odoo_Origen_ME', 'Odoo Origen ME'),
+                   ('COI_Saldo_ME', 'COI Saldo ME'), ('COI_Origen_ME', 'COI Origen ME'), ('Diff_ME', 'Diff ME'),
+                   ('TC_Odoo', 'TC Odoo'), ('TC_COI', 'TC COI'), ('TC_Valuacion', 'TC Valuacion'),
+                   ('Diff_MXN', 'Diff MXN'), ('Odoo_Valuado_MXN', 'Odoo Valuado MXN'), ('COI_Valuado_MXN', 'COI Valuado MXN'),
+                   ('Diff_Valuado_MXN', 'Diff Valuado MXN'), ('Efecto_TC', 'Efecto TC'),
+                   ('Status_ME', 'Estatus ME'), ('Status', 'Estatus')]
+        for c, (_, h) in enumerate(cols_me): ws_me.write(0, c, h, f_hdr)
+        for i, r in enumerate(df_me.to_dict('records')):
+            for c, (col, _) in enumerate(cols_me):
+                if col in ('Odoo_Cta', 'COI_Cta', 'Moneda', 'Odoo_Origen_ME', 'COI_Origen_ME', 'Status_ME', 'Status'): ws_me.write(i + 1, c, r[col], f_std_r)
+                else: safe_write_money(ws_me, i + 1, c, r[col], f_std_m)
+        ws_me.set_column('A:B', 18); ws_me.set_column('C:R', 16)
+
+    writer.close()
     print("Versión 18.7 finalizada.")
+    return df_fin
 
 if __name__ == "__main__":
     generar_analisis_v18_7()
\ No newline at end of file
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from conciliacion_coi import FILE_COI, cargar_coi_lookup, construir_arbol_coi, safe_write_money
+
+# --- CONFIGURACIÓN ---
+FILE_OUTPUT = 'Integridad_COI.xlsx'
+
+
+def generar_reporte_integridad():
+    print(f"--- Integridad del catálogo COI: {FILE_COI} ---")
+    arbol = construir_arbol_coi(cargar_coi_lookup(FILE_COI))
+    arbol = arbol.sort_values('Cuenta')
+
+    errores = arbol[arbol['Check'] != "OK"]
+    print(f"Abuelas/padres validados: {len(arbol)} | Con diferencia: {len(errores)}")
+
+    writer = pd.ExcelWriter(FILE_OUTPUT, engine='xlsxwriter')
+    wb, ws = writer.book, writer.book.add_worksheet('Integridad')
+
+    f_hdr = wb.add_format({'bg_color': '#D9D9D9', 'bold': True, 'border': 1, 'align': 'center'})
+    f_abuela = wb.add_format({'bold': True, 'bg_color': '#FFFF00', 'border': 1})
+    f_abuela_m = wb.add_format({'bold': True, 'bg_color': '#FFFF00', 'border': 1, 'num_format': '$ #,##0.00'})
+    f_std = wb.add_format({'border': 1})
+    f_std_m = wb.add_format({'border': 1, 'num_format': '$ #,##0.00'})
+    f_ok = wb.add_format({'bold': True, 'font_color': '#006100', 'align': 'center'})
+    f_err = wb.add_format({'bg_color': '#9C0006', 'font_color': '#FFFFFF', 'bold': True, 'align': 'center'})
+
+    for c, h in enumerate(['COI Cta', 'Descripcion', 'Nivel', 'Saldo', 'Suma Hijas', 'Hijas', 'Diff', 'Check']):
+        ws.write(0, c, h, f_hdr)
+
+    for i, r in enumerate(arbol.to_dict('records')):
+        row_idx = i + 1
+        fr, fm = (f_abuela, f_abuela_m) if r['Nivel'] == 'ABUELA' else (f_std, f_std_m)
+        ws.write(row_idx, 0, r['Cuenta'], fr); ws.write(row_idx, 1, r['Descripcion'], fr)
+        ws.write(row_idx, 2, r['Nivel'], fr)
+        safe_write_money(ws, row_idx, 3, r['Saldo'], fm); safe_write_money(ws, row_idx, 4, r['Suma_Hijos'], fm)
+        ws.write(row_idx, 5, int(r['Hijos']), fr)
+        safe_write_money(ws, row_idx, 6, r['Diff'] if r['Check'] != "OK" else None, fm)
+        ws.write(row_idx, 7, r['Check'], f_ok if r['Check'] == "OK" else f_err)
+
+    ws.set_column('A:A', 15); ws.set_column('B:B', 50); ws.set_column('C:H', 15); writer.close()
+    print(f"¡Listo! Reporte de integridad generado: {FILE_OUTPUT}")
+    return arbol
+
+if __name__ == "__main__":
+    generar_reporte_integridad()
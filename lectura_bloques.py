@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+
+import openpyxl
+import pandas as pd
+
+# --- CONFIGURACIÓN ---
+TAMANO_BLOQUE = 5000            # Filas del Excel por bloque
+LIMITE_CUENTAS_MEMORIA = 20000  # Cuentas parciales antes de desbordar a disco
+
+
+def iterar_bloques(ruta, tamano=TAMANO_BLOQUE, hoja=None):
+    """Lee el Excel en modo streaming y entrega listas de filas (tuplas) de tamaño acotado."""
+    wb = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        ws = wb[hoja] if hoja else wb.worksheets[0]
+        bloque = []
+        for fila in ws.iter_rows(values_only=True):
+            bloque.append(fila)
+            if len(bloque) >= tamano:
+                yield bloque
+                bloque = []
+        if bloque:
+            yield bloque
+    finally:
+        wb.close()
+
+
+class AcumuladorCuentas:
+    """
+    Agregados parciales por cuenta (saldo, descripción, movimientos).
+    Mantiene a lo más `limite` cuentas en memoria; el resto se desborda a un SQLite temporal.
+    El saldo es el último valor reportado (no se suma); los movimientos sí se acumulan.
+    """
+
+    def __init__(self, limite=LIMITE_CUENTAS_MEMORIA):
+        self.limite = limite
+        self.parciales = {}
+        self.siguiente_orden = 0
+        self._ruta = None
+        self._conn = None
+
+    def registrar(self, cuenta, descripcion=None, saldo=None, movimientos=0):
+        p = self.parciales.get(cuenta)
+        if p is None:
+            p = {'Descripcion': None, 'Saldo': None, 'Movimientos': 0, 'Orden': self.siguiente_orden}
+            self.parciales[cuenta] = p
+            self.siguiente_orden += 1
+        if descripcion is not None: p['Descripcion'] = descripcion
+        if saldo is not None: p['Saldo'] = saldo
+        p['Movimientos'] += movimientos
+
+        if len(self.parciales) > self.limite:
+            self._desbordar()
+
+    def _desbordar(self):
+        if self._conn is None:
+            fd, self._ruta = tempfile.mkstemp(prefix='acumulador_', suffix='.sqlite')
+            os.close(fd)
+            self._conn = sqlite3.connect(self._ruta)
+            self._conn.execute(
+                "CREATE TABLE parciales (cuenta TEXT PRIMARY KEY, descripcion TEXT, "
+                "saldo REAL, movimientos INTEGER, orden INTEGER)"
+            )
+        self._conn.executemany(
+            "INSERT INTO parciales VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(cuenta) DO UPDATE SET "
+            "descripcion = COALESCE(excluded.descripcion, descripcion), "
+            "saldo = COALESCE(excluded.saldo, saldo), "
+            "movimientos = movimientos + excluded.movimientos, "
+            "orden = MIN(orden, excluded.orden)",
+            [(str(c), p['Descripcion'], p['Saldo'], p['Movimientos'], p['Orden']) for c, p in self.parciales.items()]
+        )
+        self._conn.commit()
+        self.parciales = {}
+
+    def a_dataframe(self):
+        """Regresa las cuentas en el orden en que aparecieron por primera vez en el archivo."""
+        if self._conn is None:
+            df = pd.DataFrame(
+                [{'Cuenta': c, **p} for c, p in self.parciales.items()],
+                columns=['Cuenta', 'Descripcion', 'Saldo', 'Movimientos', 'Orden']
+            )
+        else:
+            self._desbordar()
+            df = pd.read_sql_query(
+                "SELECT cuenta AS Cuenta, descripcion AS Descripcion, saldo AS Saldo, "
+                "movimientos AS Movimientos, orden AS Orden FROM parciales ORDER BY orden",
+                self._conn
+            )
+        df['Saldo'] = pd.to_numeric(df['Saldo'], errors='coerce')
+        return df.sort_values('Orden').reset_index(drop=True)
+
+    def cerrar(self):
+        if self._conn is not None:
+            self._conn.close()
+            os.remove(self._ruta)
+            self._conn = None
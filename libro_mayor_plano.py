@@ -1,238 +1,106 @@
+import os
+
 import pandas as pd
 import numpy as np
 
+from lectura_bloques import iterar_bloques, AcumuladorCuentas
+from procedencia import IndiceProcedencia, ruta_indice
+from mapeos import MAJOR_NAME_MAP
+
 # --- CONFIGURACIÓN ---
 FILE_PATH = 'libro_mayor_dic.xlsx'
+FILE_OUTPUT = 'Reporte_Contable_Final.xlsx'
 HEADER_ROW = 2 
+MODO_BLOQUES = False  # True: lee el libro mayor por bloques (archivos anuales muy grandes)
+MOTOR = 'pandas'      # 'pandas' | 'polars' (requiere polars; ver motor_polars.py)
+PATRON_RECLASIFICACION_107 = 'Samuel|Villa Rodríguez'  # Cuentas 205 que se reclasifican a 107.05
+HOJA_DIVISA = 'Divisa'  # Saldo en moneda original por cuenta (lo lee tipos_cambio.py al conciliar)
+
+
+def partes_divisa(df, dueno, es_cuenta):
+    """
+    Por cuenta: suma de la columna Divisa (saldo inicial + movimientos), si hubo algún dato en Divisa
+    y si el saldo inicial trae MXN sin Divisa (ME desconocido). Se puede acumular entre bloques.
+    """
+    if 'Divisa' not in df.columns:
+        return pd.DataFrame(columns=['Divisa', 'Con_Divisa', 'Sin_Inicial'])
+    nombre = df['Nombre de la cuenta'].astype(str)
+    divisa = pd.to_numeric(df['Divisa'], errors='coerce')
+    bal = pd.to_numeric(df['Balance'], errors='coerce').fillna(0)
+    es_inicial = (nombre == 'Balance inicial') & dueno.notna()
+    lineas = es_inicial | (~es_cuenta & dueno.notna() & ~nombre.str.startswith('Total '))
+    # Movimientos sin Divisa (p.ej. diferencias cambiarias EXCH) solo mueven MXN
+    return pd.DataFrame({
+        'Divisa': divisa.fillna(0), 'Con_Divisa': divisa.notna(),
+        'Sin_Inicial': es_inicial & divisa.isna() & (bal.abs() >= 0.005),
+    })[lineas].groupby(dueno[lineas]).agg({'Divisa': 'sum', 'Con_Divisa': 'any', 'Sin_Inicial': 'any'})
+
+def saldos_divisa(partes):
+    """Combina partes_divisa (uno o varios bloques) en el saldo ME por cuenta; NaN si no se puede construir."""
+    p = pd.concat(partes).groupby(level=0).agg({'Divisa': 'sum', 'Con_Divisa': 'any', 'Sin_Inicial': 'any'})
+    return p['Divisa'].where(p['Con_Divisa'].astype(bool) & ~p['Sin_Inicial'].astype(bool))
+
+
+def cargar_cuentas_por_bloques(ruta=FILE_PATH):
+    """
+    Lee el libro mayor por bloques sin materializar los movimientos.
+    Regresa un renglón por cuenta (Código, Nombre, Balance, Movimientos, Saldo_Divisa) en el orden del archivo.
+    Nota: si un código aparece dos veces en el archivo, sus renglones se consolidan en uno.
+    """
+    acumulador = AcumuladorCuentas()
+    divisa = []
+    columnas = None
+    cuenta_actual = None
+    filas_saltadas = 0
 
-MAJOR_NAME_MAP = {
-    # --- ACTIVOS ---
-    "101": "Caja",
-    "101.01": "Caja y efectivo",
-
-    "102": "Bancos",
-    "102.01": "Bancos nacionales",
-    "102.02": "Bancos extranjeros",
-
-    # En tu columna: "Otros instrumentos financieros"
-    "104": "Otros instrumentos financieros",
-    "104.01": "Otros instrumentos financieros",
-
-    "105": "Clientes",
-    "105.01": "Clientes nacionales",
-    "105.02": "Clientes extranjeros",
-
-    "107": "Deudores diversos",
-    "107.02": "Socios y accionistas",
-    "107.05": "Otros deudores diversos",
-
-    # En tu columna va después de 119 pero es Activo: Pagos anticipados
-    "109": "Pagos anticipados",
-    "109.01": "Seguros y fianzas pagados por anticipado nacional",
-    "109.23": "Otros pagos anticipados",
-
-    "113": "Impuestos a favor",
-    "113.01": "IVA a favor",
-    "113.02": "ISR a favor",
-    "113.06": "Subsidio al empleo",
-
-    "114": "Pagos provisionales",
-    "114.01": "Pagos provisionales de ISR",
-
-    "115": "Inventario",
-    "115.01": "Inventario",
-    "115.02": "Materia prima y materiales",
-    "115.07": "Otros",
-
-    "118": "Impuestos acreditables pagados",
-    "118.01": "IVA acreditable pagado",
-    "118.03": "IEPS acreditable pagado",
-
-    "119": "Impuestos acreditables por pagar",
-    "119.01": "IVA pendiente de pago",
-    "119.03": "IEPS pendiente de pago",
-
-    "120": "Anticipo a proveedores",
-    "120.01": "Anticipo a proveedores nacional",
-    "120.02": "Anticipo a proveedores extranjero",
-
-    # --- ACTIVOS FIJOS ---
-    "153": "Maquinaria y equipo",
-    "153.01": "Maquinaria y equipo",
-
-    # En tu columna el 154 es el rubro largo; lo anclas así y dejas subgrupo 154.01
-    "154": "Automóviles, autobuses, camiones de carga, tractocamiones, montacargas y remolques",
-    "154.01": "Automóviles, autobuses, camiones de carga, tractocamiones, montacargas y remolques",
-
-    "155": "Mobiliario y equipo de oficina",
-    "155.01": "Mobiliario y equipo de oficina",
-
-    "156": "Equipo de cómputo",
-    "156.01": "Equipo de cómputo",
-
-    "160": "Otros activos fijos",
-    "160.01": "Otros activos fijos",
-
-    "171": "Depreciación acumulada de activos fijos",
-    "171.02": "Depreciación acumulada de maquinaria y equipo",
-    "171.03": "Depreciación acumulada de automóviles, autobuses y camiones",
-    "171.04": "Depreciación acumulada de mobiliario y equipo de oficina",
-    "171.05": "Depreciación acumulada de equipo de cómputo",
-
-    # En tu columna aparece 183
-    "183": "Amortización acumulada de activos diferidos",
-    "183.01": "Amortización acumulada de gastos diferidos",
-
-    # --- PASIVOS ---
-    "201": "Proveedores",
-    "201.01": "Proveedores nacionales",
-    "201.02": "Proveedores extranjeros",
-    "201.03": "Otras cuentas de proveedores",  # (ej. garantías comerciales)
-
-    "205": "Acreedores diversos a corto plazo",
-    "205.01": "Socios, accionistas o representante legal",
-    "205.02": "Acreedores diversos a corto plazo nacional",
-    "205.06": "Mercancías recibidas - no facturas",
-
-    # En tu columna también aparece 251
-    "251": "Acreedores diversos a largo plazo",
-    "251.02": "Acreedores diversos a largo plazo nacional",
-    "251.03": "Acreedores diversos a largo plazo extranjero",
-
-    "206": "Anticipo de cliente",
-    "206.01": "Anticipo de cliente nacional",
-
-    "208": "Impuestos trasladados cobrados",
-    "208.01": "IVA trasladado cobrado",
-
-    # En tu columna aparece 209 (no estaba en tu mapa)
-    "209": "Impuestos trasladados no cobrados",
-    "209.01": "IVA trasladado no cobrado",
-
-    "210": "Provisión de sueldos y salarios por pagar",
-    "210.01": "Provisión de sueldos y salarios por pagar",
-    "210.07": "Provisión de otros sueldos y salarios por pagar",
-
-    "211": "Provisión de contribuciones de seguridad social por pagar",
-    "211.01": "Provisión de IMSS patronal por pagar",
-    "211.02": "Provisión de SAR por pagar",
-    "211.03": "Provisión de Infonavit por pagar",
-
-    "213": "Impuestos y derechos por pagar",
-    "213.01": "IVA por pagar",
-    "213.04": "Impuesto estatal sobre nómina por pagar",
-
-    "216": "Impuestos retenidos",
-    "216.01": "Retenciones ISR por sueldos y salarios",
-    "216.02": "Retenciones ISR por asimilados a salarios",
-    "216.03": "Retenciones ISR por arrendamiento",
-    "216.04": "Retenciones ISR por servicios profesionales",
-    "216.10": "Impuestos retenidos de IVA",
-    "216.11": "Retenciones de IMSS a los trabajadores",
-
-    # --- CAPITAL ---
-    "301": "Capital social",
-    "301.01": "Capital fijo",
-    "301.02": "Capital variable",
-
-    # En tu columna aparecen 304 y 305
-    "304": "Resultado de ejercicios anteriores",
-    "304.01": "Utilidad de ejercicios anteriores",
-
-    "305": "Resultado del ejercicio",
-    "305.01": "Utilidad del ejercicio",
-
-    # --- INGRESOS Y COSTOS ---
-    "401": "Ingresos",
-    "401.01": "Ventas y/o servicios gravados a la tasa general",
-    "401.04": "Ventas y/o servicios gravados al 0%",
-
-    # En tu columna aparece 402
-    "402": "Devoluciones, descuentos o bonificaciones sobre ingresos",
-    "402.02": "Devoluciones, descuentos o bonificaciones sobre ventas y/o servicios al 0%",
-
-    "501": "Costo de venta y/o servicio",
-    "501.01": "Costo de venta",
-    "501.08": "Otros conceptos de costo",
-
-    # --- RESULTADOS (GASTOS Y PRODUCTOS) ---
-    "601": "Gastos generales",
-    "601.84": "Otros gastos generales",
-
-    "602": "Costo de venta",
-    # Lo que sí aparece como nodo en tu columna (y/o ya lo traías)
-    "602.72": "Fletes y acarreos",
-    "602.61": "Propaganda y publicidad",
-    "602.34": "Honorarios a personas físicas residentes nacionales",
-    "602.84": "Otros gastos de venta",  # en tu columna hay varios 602.84.xx
-
-    "603": "Gastos de administración",
-    "603.01": "Sueldos y salarios",
-    "603.03": "Tiempos extras",
-    "603.06": "Vacaciones",
-    "603.07": "Prima vacacional",
-    "603.12": "Aguinaldo",
-    "603.15": "Despensa",
-    "603.16": "Transporte",
-    "603.22": "Estímulo al personal",
-    "603.25": "Otras prestaciones al personal",
-    "603.26": "Cuotas al IMSS",
-    "603.27": "Aportaciones al Infonavit",
-    "603.28": "Aportaciones al SAR",
-    "603.29": "Impuesto estatal sobre nóminas",
-    "603.31": "Asimilados a salarios",
-    "603.34": "Honorarios a personas físicas residentes nacionales",
-    "603.48": "Combustibles y lubricantes",
-    "603.49": "Viáticos y gastos de viaje",
-    "603.50": "Teléfono, internet",
-    "603.54": "Limpieza",
-    "603.55": "Papelería y artículos de oficina",
-    "603.56": "Mantenimiento y conservación",
-    "603.57": "Seguros y fianzas",
-    "603.58": "Otros impuestos y derechos",
-    "603.81": "Gastos no deducibles (sin requisitos fiscales)",
-    "603.82": "Otros gastos de administración",
-
-    "604": "Gastos de fabricación",
-    "604.56": "Mantenimiento y conservación de maquinaria y equipo",
-    "604.59": "Recargos fiscales",
-
-    # --- 7 Resultado ---
-    "701": "Gastos financieros",
-    "701.01": "Pérdida cambiaria",
-    "701.05": "Intereses a cargo bancario extranjero",
-    "701.10": "Comisiones bancarias",
-
-    "702": "Productos financieros",
-    "702.01": "Utilidad cambiaria",
-    "702.04": "Intereses a favor bancarios nacional",
-
-    "703": "Otros gastos",
-    "703.02": "Pérdida en venta y/o baja de edificios",
-
-    "704": "Otros productos",
-    "704.03": "Ganancia en venta y/o baja de maquinaria y equipo",
-}
-
-
-def procesar_contabilidad():
-    print(f"--- Procesando {FILE_PATH} (Saldo tomado directamente del renglón de la cuenta) ---")
-    
     try:
-        df = pd.read_excel(FILE_PATH, header=HEADER_ROW, engine='openpyxl')
-    except Exception as e:
-        print(f"Error: {e}")
-        return
-
-    # 1. Preparar Datos Base
-    # Filtramos solo las filas que tienen código de cuenta
-    cuentas_df = df[df['Código'].notna()].copy()
-    
+        for bloque in iterar_bloques(ruta):
+            # Saltamos los renglones previos al encabezado (como header=HEADER_ROW)
+            if columnas is None:
+                faltan = HEADER_ROW - filas_saltadas
+                if faltan >= len(bloque):
+                    filas_saltadas += len(bloque)
+                    continue
+                columnas = list(bloque[faltan])
+                bloque = bloque[faltan + 1:]
+                if not bloque: continue
+
+            df = pd.DataFrame(bloque, columns=columnas)
+            es_cuenta = df['Código'].notna()
+
+            # Cada movimiento pertenece a la última cuenta vista (aunque esté en el bloque anterior)
+            dueno = df['Código'].where(es_cuenta).ffill()
+            if cuenta_actual is not None: dueno = dueno.fillna(cuenta_actual)
+            nombre = df['Nombre de la cuenta'].astype(str)
+            es_mov = (
+                ~es_cuenta & dueno.notna() &
+                (nombre != 'Balance inicial') & ~nombre.str.startswith('Total ')
+            )
+            movs = dueno[es_mov].value_counts(sort=False)
+            divisa.append(partes_divisa(df, dueno, es_cuenta))
+
+            for cta, nom, bal in zip(df.loc[es_cuenta, 'Código'], df.loc[es_cuenta, 'Nombre de la cuenta'], df.loc[es_cuenta, 'Balance']):
+                acumulador.registrar(cta, descripcion=nom, saldo=pd.to_numeric(bal, errors='coerce'))
+            for cta, n in movs.items():
+                acumulador.registrar(cta, movimientos=int(n))
+
+            if dueno.notna().any(): cuenta_actual = dueno.dropna().iloc[-1]
+
+        resultado = acumulador.a_dataframe()
+        resultado['Saldo_Divisa'] = resultado['Cuenta'].map(saldos_divisa(divisa)) if divisa else np.nan
+    finally:
+        acumulador.cerrar()
+
+    return resultado.rename(columns={'Cuenta': 'Código', 'Descripcion': 'Nombre de la cuenta', 'Saldo': 'Balance'})
+
+
+def aplanar_libro(cuentas_df):
+    """Renglones de cuenta -> df_final con saldo, niveles N1/N2 y reclasificación, ya ordenado."""
     # --- CAMBIO AQUÍ ---
     # Tomamos el saldo directamente de la columna 'Balance' de esa misma fila
     cuentas_df['Saldo_Final'] = pd.to_numeric(cuentas_df['Balance'], errors='coerce').fillna(0)
     
-    df_final = cuentas_df[['Código', 'Nombre de la cuenta', 'Saldo_Final']].rename(
+    df_final = cuentas_df[['Código', 'Nombre de la cuenta', 'Saldo_Final', 'Saldo_Divisa']].rename(
         columns={'Código': 'Cuenta', 'Nombre de la cuenta': 'Descripcion_Cuenta'}
     )
     
@@ -241,7 +109,7 @@ def procesar_contabilidad():
     # --- REGLA DE RECLASIFICACIÓN: SAMUEL VILLA (205 -> 107.05) ---
     mask_samuel = (
         df_final['Cuenta'].astype(str).str.startswith('205') & 
-        df_final['Descripcion_Cuenta'].str.contains('Samuel|Villa Rodríguez', case=False, na=False)
+        df_final['Descripcion_Cuenta'].str.contains(PATRON_RECLASIFICACION_107, case=False, na=False)
     )
     
     # Agrupación y Reclasificación
@@ -254,6 +122,50 @@ def procesar_contabilidad():
 
     # Ordenar
     df_final.sort_values(['Grupo_N1', 'Grupo_N2', 'Cuenta'], inplace=True)
+    return df_final
+
+
+def procesar_contabilidad(por_bloques=MODO_BLOQUES, motor=MOTOR, ruta=FILE_PATH, salida=FILE_OUTPUT):
+    if motor not in ('pandas', 'polars'):
+        raise ValueError(f"Motor desconocido: {motor!r} (usar 'pandas' o 'polars')")
+    print(f"--- Procesando {ruta} (Saldo tomado directamente del renglón de la cuenta) ---")
+    
+    # 1. Preparar Datos Base
+    # Filtramos solo las filas que tienen código de cuenta
+    indice = None
+    if motor == 'polars':
+        # Filtrar -> saldo -> niveles -> reclasificación como plan lazy (ver motor_polars.py)
+        try:
+            from motor_polars import aplanar_libro_polars
+            df_final = aplanar_libro_polars(ruta, PATRON_RECLASIFICACION_107)
+        except Exception as e:
+            print(f"Error: {e}")
+            return
+    else:
+        if por_bloques:
+            try:
+                cuentas_df = cargar_cuentas_por_bloques(ruta)
+            except Exception as e:
+                print(f"Error: {e}")
+                return
+        else:
+            try:
+                df = pd.read_excel(ruta, header=HEADER_ROW, engine='openpyxl')
+            except Exception as e:
+                print(f"Error: {e}")
+                return
+            es_cuenta = df['Código'].notna()
+            cuentas_df = df[es_cuenta].copy()
+            dueno = df['Código'].where(es_cuenta).ffill()
+            cuentas_df['Saldo_Divisa'] = cuentas_df['Código'].map(saldos_divisa([partes_divisa(df, dueno, es_cuenta)]))
+
+            # Procedencia: cada cuenta abarca desde su renglón hasta el de la siguiente cuenta
+            # (fila Excel = posición + encabezado + 2)
+            indice = IndiceProcedencia.desde_posiciones(
+                ruta, df, np.flatnonzero(es_cuenta), cuentas_df['Código'], fila_base=HEADER_ROW + 2
+            )
+
+        df_final = aplanar_libro(cuentas_df)
 
     # 4. Construir Reporte
     filas_reporte = []
@@ -287,7 +199,8 @@ def procesar_contabilidad():
                     'Cuenta': row['Cuenta'], 
                     'Descripcion': row['Descripcion_Cuenta'], 
                     'Saldo': row['Saldo_Final'], 
-                    'Nivel': 3
+                    'Nivel': 3,
+                    'Saldo_Divisa': row['Saldo_Divisa']
                 })
 
         # --- LÓGICA ESPECIAL PARA EL 107 ---
@@ -317,7 +230,7 @@ def procesar_contabilidad():
     )
 
     # 5. Exportar a Excel
-    nombre_archivo = 'Reporte_Contable_Final.xlsx'
+    nombre_archivo = salida
     print(f"Generando Excel: {nombre_archivo}...")
     
     writer = pd.ExcelWriter(nombre_archivo, engine='xlsxwriter')
@@ -382,8 +295,18 @@ def procesar_contabilidad():
     worksheet.set_column('C:C', 18)
     worksheet.set_column('D:D', 10)
 
+    # Saldos en moneda original: solo las cuentas donde la columna Divisa permite construirlos
+    hoja_divisa = reporte.loc[reporte['Saldo_Divisa'].notna(), ['Cuenta', 'Saldo_Divisa']]
+    hoja_divisa.to_excel(writer, index=False, sheet_name=HOJA_DIVISA)
+    writer.sheets[HOJA_DIVISA].set_column('A:B', 18)
+
     writer.close()
+
+    # El modo por bloques no conserva renglones de origen: no dejamos un índice viejo
+    if indice is not None: indice.guardar(ruta_indice(nombre_archivo))
+    elif os.path.exists(ruta_indice(nombre_archivo)): os.remove(ruta_indice(nombre_archivo))
     print(f"¡Listo! Archivo completado exitosamente: {nombre_archivo}")
+    return reporte
 
 if __name__ == "__main__":
     procesar_contabilidad()
\ No newline at end of file
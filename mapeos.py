@@ -0,0 +1,274 @@
+# Mapeos de la conciliación sin dependencias pesadas (solo Python), para que la CLI
+# pueda listarlos y validarlos sin importar pandas. Los scripts los re-exportan.
+
+# --- 1. DICCIONARIO DE CONTROL PARA CHECK ABUELAS ---
+CHECK_ABUELAS_LIST = [
+    '1110-000-000', '1120-000-000', '1121-000-000', '1122-000-000',
+    '1140-000-000', '1150-000-000', '1170-000-000', '1180-000-000',
+    '1190-000-000', '1200-000-000', '1201-000-000', '1215-000-000',
+    '1310-006-000','1360-000-000','1360-002-000', '2150-000-000', '2160-000-000',
+    '2170-000-000','2180-000-000', '1310-004-000', '2130-000-000', '4100-000-000',
+    '6200-000-000','7200-000-000',
+    '2110-000-000', '2120-000-000', '2190-000-000', 'SUMA-BANCOS-TOTAL',
+    'SUMA-CLIENTES-NACIONALES', 'SUMA-CLIENTES-EXTRANJEROS'
+]
+
+# --- 2. MAPA MAESTRO ---
+HEADER_MAP = {
+    '101': '1110-000-000', '102': 'SUMA-BANCOS-TOTAL', '102.01': '1120-000-000', 
+    '102.02.01':'1121-001-000',
+    '102.02':'SUMA-BANCOS-USD','105.01.00':'1150-001-000', '102.02.02':'1122-000-000',
+    '104': '1140-000-000',
+    '105': '1150-000-000', '105.01': 'SUMA-CLIENTES-NACIONALES', '105.02': 'SUMA-CLIENTES-EXTRANJEROS',
+    '107': '1170-000-000', '107.02': '1170-002-000','109': '1210-000-000', '113': '1180-000-000', 
+    '115': '1190-000-000', '118': '1200-000-000', '119': '1201-000-000', '154':'1310-003-000','155':'1310-005-000',
+    '120': '1215-000-000', '120.02.01':'1215-002-000','114': '1220-000-000', '153': '1310-006-000',
+    '156':'1310-004-000', '160':'1310-007-000', 
+    '171': '1360-000-000',  '171.03': '1360-002-000','201': '2110-000-000', '201.01':'2110-001-000',
+    '201.03.01':'2115-000-000', '205.02.06' :'2120-001-013', 
+    '205': '2120-000-000', '205.02': '2120-001-000','205.02.01':'2120-001-001','201.01.01':'2110-001-001',
+    '205.02.09':'2120-001-019', 
+    '206': '2190-000-000', '206.01.01': '2190-001-000', '213': '2140-000-000', '216': '2150-000-000', 
+    '210': '2160-000-000', '211': '2170-000-000', '208': '2180-000-000', 
+    '209': '2181-000-000', '251': '2130-000-000', '401': '4100-000-000', '401.04.01':'4100-002-000',
+    '402': '4200-000-000', '402.02.01':'4200-002-000','501': '5000-000-000',  '501.08':'5100-000-000', '501.08.08':'5200-000-000','602': '6100-000-000', 
+    '603': '6200-000-000', '603.82': '6200-055-000', '604.59': '6200-034-000',
+    '702': '7100-000-000', '701': '7200-000-000',  '701.05': '7200-005-000',
+    '704': '7300-000-000', '703': '7400-000-000'
+}
+
+COI_TO_ODOO_SECTION = {
+    '1110': '101', '1120': '102', '1140': '104', '1150': '105', '1170': '107',
+    '1180': '113', '1190': '115', '1191': '115', '1192': '115','2180':'205',
+    '2120':'205', '2115':'205', '2181':'205', '2190':'205', '2160':'205',
+    '1200': '118', '1201': '119', '1210': '109', '1215': '120', '1220': '114',
+    '1310': '153', '1360': '171', '2110': '201', '2130': '251', '1460':'183',
+    '4100': '401', '4200': '402', '5000': '501', '5100': '501', '5200': '501',
+    '6100': '602', '6200': '603', '7100': '702', '7200': '701', '7300': '704', '7400': '703'
+}
+
+# --- 3. SUMAS VIRTUALES ---
+VIRTUAL_COI_SUMS = {
+    'SUMA-BANCOS-TOTAL': ['1120-000-000', '1121-000-000', '1122-000-000'],
+    'SUMA-BANCOS-USD': ['1121-001-000', '1122-000-000'],
+    'SUMA-CLIENTES-NACIONALES': ['1150-001-000', '1150-004-000', '1150-005-000', '1150-006-000'],
+    'SUMA-CLIENTES-EXTRANJEROS': ['1150-002-000', '1150-003-000'],
+    'SUMA-PROVEEDORES-NACIONALES': ['1150-002-000', '2115-000-000']
+}
+
+# --- 4. NOMBRES DE RUBROS ODOO (Nivel 1 / Nivel 2) ---
+MAJOR_NAME_MAP = {
+    # --- ACTIVOS ---
+    "101": "Caja",
+    "101.01": "Caja y efectivo",
+
+    "102": "Bancos",
+    "102.01": "Bancos nacionales",
+    "102.02": "Bancos extranjeros",
+
+    # En tu columna: "Otros instrumentos financieros"
+    "104": "Otros instrumentos financieros",
+    "104.01": "Otros instrumentos financieros",
+
+    "105": "Clientes",
+    "105.01": "Clientes nacionales",
+    "105.02": "Clientes extranjeros",
+
+    "107": "Deudores diversos",
+    "107.02": "Socios y accionistas",
+    "107.05": "Otros deudores diversos",
+
+    # En tu columna va después de 119 pero es Activo: Pagos anticipados
+    "109": "Pagos anticipados",
+    "109.01": "Seguros y fianzas pagados por anticipado nacional",
+    "109.23": "Otros pagos anticipados",
+
+    "113": "Impuestos a favor",
+    "113.01": "IVA a favor",
+    "113.02": "ISR a favor",
+    "113.06": "Subsidio al empleo",
+
+    "114": "Pagos provisionales",
+    "114.01": "Pagos provisionales de ISR",
+
+    "115": "Inventario",
+    "115.01": "Inventario",
+    "115.02": "Materia prima y materiales",
+    "115.07": "Otros",
+
+    "118": "Impuestos acreditables pagados",
+    "118.01": "IVA acreditable pagado",
+    "118.03": "IEPS acreditable pagado",
+
+    "119": "Impuestos acreditables por pagar",
+    "119.01": "IVA pendiente de pago",
+    "119.03": "IEPS pendiente de pago",
+
+    "120": "Anticipo a proveedores",
+    "120.01": "Anticipo a proveedores nacional",
+    "120.02": "Anticipo a proveedores extranjero",
+
+    # --- ACTIVOS FIJOS ---
+    "153": "Maquinaria y equipo",
+    "153.01": "Maquinaria y equipo",
+
+    # En tu columna el 154 es el rubro largo; lo anclas así y dejas subgrupo 154.01
+    "154": "Automóviles, autobuses, camiones de carga, tractocamiones, montacargas y remolques",
+    "154.01": "Automóviles, autobuses, camiones de carga, tractocamiones, montacargas y remolques",
+
+    "155": "Mobiliario y equipo de oficina",
+    "155.01": "Mobiliario y equipo de oficina",
+
+    "156": "Equipo de cómputo",
+    "156.01": "Equipo de cómputo",
+
+    "160": "Otros activos fijos",
+    "160.01": "Otros activos fijos",
+
+    "171": "Depreciación acumulada de activos fijos",
+    "171.02": "Depreciación acumulada de maquinaria y equipo",
+    "171.03": "Depreciación acumulada de automóviles, autobuses y camiones",
+    "171.04": "Depreciación acumulada de mobiliario y equipo de oficina",
+    "171.05": "Depreciación acumulada de equipo de cómputo",
+
+    # En tu columna aparece 183
+    "183": "Amortización acumulada de activos diferidos",
+    "183.01": "Amortización acumulada de gastos diferidos",
+
+    # --- PASIVOS ---
+    "201": "Proveedores",
+    "201.01": "Proveedores nacionales",
+    "201.02": "Proveedores extranjeros",
+    "201.03": "Otras cuentas de proveedores",  # (ej. garantías comerciales)
+
+    "205": "Acreedores diversos a corto plazo",
+    "205.01": "Socios, accionistas o representante legal",
+    "205.02": "Acreedores diversos a corto plazo nacional",
+    "205.06": "Mercancías recibidas - no facturas",
+
+    # En tu columna también aparece 251
+    "251": "Acreedores diversos a largo plazo",
+    "251.02": "Acreedores diversos a largo plazo nacional",
+    "251.03": "Acreedores diversos a largo plazo extranjero",
+
+    "206": "Anticipo de cliente",
+    "206.01": "Anticipo de cliente nacional",
+
+    "208": "Impuestos trasladados cobrados",
+    "208.01": "IVA trasladado cobrado",
+
+    # En tu columna aparece 209 (no estaba en tu mapa)
+    "209": "Impuestos trasladados no cobrados",
+    "209.01": "IVA trasladado no cobrado",
+
+    "210": "Provisión de sueldos y salarios por pagar",
+    "210.01": "Provisión de sueldos y salarios por pagar",
+    "210.07": "Provisión de otros sueldos y salarios por pagar",
+
+    "211": "Provisión de contribuciones de seguridad social por pagar",
+    "211.01": "Provisión de IMSS patronal por pagar",
+    "211.02": "Provisión de SAR por pagar",
+    "211.03": "Provisión de Infonavit por pagar",
+
+    "213": "Impuestos y derechos por pagar",
+    "213.01": "IVA por pagar",
+    "213.04": "Impuesto estatal sobre nómina por pagar",
+
+    "216": "Impuestos retenidos",
+    "216.01": "Retenciones ISR por sueldos y salarios",
+    "216.02": "Retenciones ISR por asimilados a salarios",
+    "216.03": "Retenciones ISR por arrendamiento",
+    "216.04": "Retenciones ISR por servicios profesionales",
+    "216.10": "Impuestos retenidos de IVA",
+    "216.11": "Retenciones de IMSS a los trabajadores",
+
+    # --- CAPITAL ---
+    "301": "Capital social",
+    "301.01": "Capital fijo",
+    "301.02": "Capital variable",
+
+    # En tu columna aparecen 304 y 305
+    "304": "Resultado de ejercicios anteriores",
+    "304.01": "Utilidad de ejercicios anteriores",
+
+    "305": "Resultado del ejercicio",
+    "305.01": "Utilidad del ejercicio",
+
+    # --- INGRESOS Y COSTOS ---
+    "401": "Ingresos",
+    "401.01": "Ventas y/o servicios gravados a la tasa general",
+    "401.04": "Ventas y/o servicios gravados al 0%",
+
+    # En tu columna aparece 402
+    "402": "Devoluciones, descuentos o bonificaciones sobre ingresos",
+    "402.02": "Devoluciones, descuentos o bonificaciones sobre ventas y/o servicios al 0%",
+
+    "501": "Costo de venta y/o servicio",
+    "501.01": "Costo de venta",
+    "501.08": "Otros conceptos de costo",
+
+    # --- RESULTADOS (GASTOS Y PRODUCTOS) ---
+    "601": "Gastos generales",
+    "601.84": "Otros gastos generales",
+
+    "602": "Costo de venta",
+    # Lo que sí aparece como nodo en tu columna (y/o ya lo traías)
+    "602.72": "Fletes y acarreos",
+    "602.61": "Propaganda y publicidad",
+    "602.34": "Honorarios a personas físicas residentes nacionales",
+    "602.84": "Otros gastos de venta",  # en tu columna hay varios 602.84.xx
+
+    "603": "Gastos de administración",
+    "603.01": "Sueldos y salarios",
+    "603.03": "Tiempos extras",
+    "603.06": "Vacaciones",
+    "603.07": "Prima vacacional",
+    "603.12": "Aguinaldo",
+    "603.15": "Despensa",
+    "603.16": "Transporte",
+    "603.22": "Estímulo al personal",
+    "603.25": "Otras prestaciones al personal",
+    "603.26": "Cuotas al IMSS",
+    "603.27": "Aportaciones al Infonavit",
+    "603.28": "Aportaciones al SAR",
+    "603.29": "Impuesto estatal sobre nóminas",
+    "603.31": "Asimilados a salarios",
+    "603.34": "Honorarios a personas físicas residentes nacionales",
+    "603.48": "Combustibles y lubricantes",
+    "603.49": "Viáticos y gastos de viaje",
+    "603.50": "Teléfono, internet",
+    "603.54": "Limpieza",
+    "603.55": "Papelería y artículos de oficina",
+    "603.56": "Mantenimiento y conservación",
+    "603.57": "Seguros y fianzas",
+    "603.58": "Otros impuestos y derechos",
+    "603.81": "Gastos no deducibles (sin requisitos fiscales)",
+    "603.82": "Otros gastos de administración",
+
+    "604": "Gastos de fabricación",
+    "604.56": "Mantenimiento y conservación de maquinaria y equipo",
+    "604.59": "Recargos fiscales",
+
+    # --- 7 Resultado ---
+    "701": "Gastos financieros",
+    "701.01": "Pérdida cambiaria",
+    "701.05": "Intereses a cargo bancario extranjero",
+    "701.10": "Comisiones bancarias",
+
+    "702": "Productos financieros",
+    "702.01": "Utilidad cambiaria",
+    "702.04": "Intereses a favor bancarios nacional",
+
+    "703": "Otros gastos",
+    "703.02": "Pérdida en venta y/o baja de edificios",
+
+    "704": "Otros productos",
+    "704.03": "Ganancia en venta y/o baja de maquinaria y equipo",
+}
+
+# --- HELPERS ---
+def normalize_code(code):
+    if not code or code != code: return ""  # code != code: NaN
+    s = str(code).upper().strip()
+    if s.startswith("SUMA-") or s.startswith("COI-"): return s
+    return s.replace('.', '').replace('-', '')
@@ -0,0 +1,185 @@
+import importlib.util
+
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError:  # Motor opcional: el flujo normal solo necesita pandas
+    pl = None
+
+# --- CONFIGURACIÓN ---
+PATRON_CUENTA_COI = r"Cuenta\s*:\s*([\d-]+)\s+(.*)"
+MAX_NIVELES_COI = 6  # Segmentos 'XXXX-YYY-ZZZ-...' que se consideran para padres/hijas
+
+
+def _requiere_polars():
+    if pl is None:
+        raise ImportError("El motor 'polars' requiere el paquete polars (pip install polars fastexcel)")
+
+def _leer_como_texto(ruta):
+    """
+    Hoja 1 completa como columnas de texto (column_0, column_1, ...).
+    Con fastexcel se lee directo con calamine; sin él, se reutiliza la lectura de pandas.
+    Nota: calamine omite renglones vacíos, así que aquí no se confía en posiciones fijas.
+    """
+    if importlib.util.find_spec('fastexcel') is not None:
+        return pl.read_excel(ruta, engine='calamine', has_header=False, infer_schema_length=0)
+
+    df = pd.read_excel(ruta, header=None, engine='openpyxl')
+    return pl.DataFrame({
+        f'column_{i}': [None if pd.isna(v) else str(v) for v in df[c]] for i, c in enumerate(df.columns)
+    }, schema={f'column_{i}': pl.String for i in range(df.shape[1])})
+
+def _a_pandas(df):
+    # Sin depender de pyarrow
+    return pd.DataFrame(df.to_dict(as_series=False))
+
+
+# --- LIBRO MAYOR (Odoo) ---
+def aplanar_libro_polars(ruta, patron_reclasificacion):
+    """
+    Equivalente lazy de la preparación de procesar_contabilidad:
+    filtrar cuentas -> saldo numérico (y en Divisa) -> niveles N1/N2 -> reclasificación 205 -> 107.05 -> orden.
+    """
+    _requiere_polars()
+    crudo = _leer_como_texto(ruta)
+    col0 = crudo.columns[0]
+
+    # El encabezado es el primer renglón cuya primera celda dice 'Código'
+    fila_enc = crudo.with_row_index('i').filter(pl.col(col0) == 'Código')['i'][0]
+    nombres = [n if n is not None else c for c, n in zip(crudo.columns, crudo.row(fila_enc))]
+    datos = crudo.slice(fila_enc + 1).rename(dict(zip(crudo.columns, nombres)))
+
+    # Saldo en moneda original por cuenta (mismas reglas que partes_divisa / saldos_divisa)
+    nombre = pl.col('Nombre de la cuenta').fill_null('')
+    divisa = pl.col('Divisa').cast(pl.Float64, strict=False) if 'Divisa' in datos.columns else pl.lit(None, pl.Float64)
+    dueno = pl.col('Código').forward_fill()
+    es_inicial = (nombre == 'Balance inicial') & dueno.is_not_null()
+    es_linea = es_inicial | (pl.col('Código').is_null() & dueno.is_not_null() & ~nombre.str.starts_with('Total '))
+    saldos_me = (
+        datos.lazy()
+        .with_columns(
+            dueno.alias('Cuenta'), divisa.alias('Divisa'), es_linea.alias('Es_Linea'),
+            (es_inicial & divisa.is_null() & (pl.col('Balance').cast(pl.Float64, strict=False).fill_null(0.0).abs() >= 0.005))
+              .alias('Sin_Inicial'),
+        )
+        .filter(pl.col('Es_Linea'))
+        .group_by('Cuenta')
+        .agg(
+            pl.col('Divisa').fill_null(0.0).sum(),
+            pl.col('Divisa').is_not_null().any().alias('Con_Divisa'),
+            pl.col('Sin_Inicial').any(),
+        )
+        .select('Cuenta', pl.when(pl.col('Con_Divisa') & ~pl.col('Sin_Inicial')).then(pl.col('Divisa')).alias('Saldo_Divisa'))
+    )
+
+    cuenta = pl.col('Cuenta')
+    es_reclasificada = (
+        cuenta.str.starts_with('205') &
+        pl.col('Descripcion_Cuenta').str.contains(f"(?i){patron_reclasificacion}").fill_null(False)
+    )
+    plan = (
+        datos.lazy()
+        .filter(pl.col('Código').is_not_null())
+        .select(
+            pl.col('Código').alias('Cuenta'),
+            pl.col('Nombre de la cuenta').alias('Descripcion_Cuenta'),
+            pl.col('Balance').cast(pl.Float64, strict=False).fill_null(0.0).alias('Saldo_Final'),
+        )
+        .join(saldos_me, on='Cuenta', how='left')
+        .with_columns(
+            pl.when(es_reclasificada).then(pl.lit('107')).otherwise(cuenta.str.slice(0, 3)).alias('Grupo_N1'),
+            pl.when(es_reclasificada).then(pl.lit('107.05')).otherwise(cuenta.str.slice(0, 6)).alias('Grupo_N2'),
+            pl.when(es_reclasificada)
+              .then(pl.col('Descripcion_Cuenta') + " (Reclasificado)")
+              .otherwise(pl.col('Descripcion_Cuenta')).alias('Descripcion_Cuenta'),
+        )
+        .sort(['Grupo_N1', 'Grupo_N2', 'Cuenta'], maintain_order=True)
+    )
+    return _a_pandas(plan.collect())
+
+
+# --- AUXILIAR COI ---
+def _columna_saldo(crudo):
+    """Misma regla que detectar_columna_saldo: última columna 'Saldo' (no 'inicial') en los primeros 20 renglones."""
+    for fila in crudo.head(20).iter_rows():
+        candidatas = [i for i, v in enumerate(fila) if "Saldo" in str(v) and "inicial" not in str(v)]
+        if candidatas: return crudo.columns[candidatas[-1]]
+    return crudo.columns[-1]
+
+def _prefijos(lf, columna_valor):
+    """Renglones (Prefijo, valor) con cada prefijo 'XXXX-', 'XXXX-YYY-', ... de la cuenta."""
+    return pl.concat([
+        lf.select(
+            pl.col('Cuenta').str.extract(rf'^((?:[^-]*-){{{k}}})', 1).alias('Prefijo'),
+            pl.col(columna_valor)
+        )
+        for k in range(1, MAX_NIVELES_COI + 1)
+    ]).filter(pl.col('Prefijo').is_not_null())
+
+def limpiar_coi_polars(ruta):
+    """
+    Equivalente lazy de los pasos 1-4 de procesar_coi_final: bloques 'Cuenta : ...' -> último saldo
+    de cada bloque -> base de la cuenta -> hojas vs padres -> check contra la suma de hojas.
+    """
+    _requiere_polars()
+    crudo = _leer_como_texto(ruta)
+    col_saldo = _columna_saldo(crudo)
+
+    texto = pl.concat_str([pl.col(c) for c in crudo.columns[:3]], separator=' ', ignore_nulls=True)
+    num = pl.col(col_saldo).str.replace_all(',', '', literal=True).str.replace_all(' ', '', literal=True).cast(pl.Float64, strict=False)
+
+    cuentas = (
+        crudo.lazy()
+        .with_row_index('Fila_Origen')
+        .with_columns(
+            texto.str.extract(PATRON_CUENTA_COI, 1).str.strip_chars().alias('Cuenta'),
+            texto.str.extract(PATRON_CUENTA_COI, 2).str.strip_chars().alias('Descripcion'),
+            num.alias('Num'),
+        )
+        .with_columns(pl.col('Cuenta').is_not_null().cum_sum().alias('Bloque'))
+        .filter(pl.col('Bloque') > 0)
+        .group_by('Bloque', maintain_order=True)
+        .agg(
+            pl.col('Cuenta').first(),
+            pl.col('Descripcion').first(),
+            pl.col('Num').drop_nulls().last().fill_null(0.0).alias('Saldo'),
+            (pl.col('Num').is_not_null() & pl.col('Cuenta').is_null()).sum().cast(pl.Int64).alias('Movimientos'),
+            pl.col('Fila_Origen').first().cast(pl.Int64),
+        )
+        .drop('Bloque')
+        .with_columns(pl.col('Cuenta').str.replace(r'^(.*?)(?:-?000)+$', '${1}').alias('Codigo_Base'))
+        .with_columns((pl.col('Codigo_Base') + '-').alias('Prefijo_Hijas'))
+    ).cache()
+
+    # Padre: alguna otra cuenta (única) empieza con 'base-'
+    conteo = _prefijos(cuentas.select('Cuenta').unique(), 'Cuenta').group_by('Prefijo').agg(pl.len().alias('N_Hijas'))
+    cuentas = (
+        cuentas.join(conteo, left_on='Prefijo_Hijas', right_on='Prefijo', how='left', maintain_order='left')
+        .with_columns(
+            ((pl.col('N_Hijas').fill_null(0) - pl.col('Cuenta').str.starts_with(pl.col('Prefijo_Hijas')).cast(pl.UInt32)) > 0)
+            .alias('Es_Padre')
+        )
+        .with_columns(pl.col('Cuenta').str.ends_with('000-000').alias('Es_Madre_Suprema'))
+    ).cache()
+
+    # Check: saldo del padre contra la suma de sus hojas
+    suma_hojas = (
+        _prefijos(cuentas.filter(~pl.col('Es_Padre')), 'Saldo')
+        .group_by('Prefijo').agg(pl.col('Saldo').sum().alias('Suma_Hijas'))
+    )
+    df = (
+        cuentas.join(suma_hojas, left_on='Prefijo_Hijas', right_on='Prefijo', how='left', maintain_order='left')
+        .with_columns((pl.col('Saldo') - pl.col('Suma_Hijas').fill_null(0.0)).alias('Diff'))
+        .collect()
+    )
+
+    checks = [
+        "" if not padre else ("OK (0.00)" if abs(d) < 0.1 else f"DIF: {d:,.2f}")
+        for padre, d in zip(df['Es_Padre'], df['Diff'])
+    ]
+    df = df.with_columns(pl.Series('Check', checks, dtype=pl.String))
+    return _a_pandas(df.select([
+        'Cuenta', 'Descripcion', 'Saldo', 'Movimientos', 'Fila_Origen',
+        'Codigo_Base', 'Es_Padre', 'Es_Madre_Suprema', 'Check'
+    ]))
@@ -0,0 +1,99 @@
+import os
+import pickle
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+# --- CONFIGURACIÓN ---
+SUFIJO_INDICE = '.procedencia.pkl'
+
+
+def ruta_indice(ruta_reporte):
+    """El índice vive junto al reporte que lo originó: Reporte.xlsx -> Reporte.procedencia.pkl"""
+    return os.path.splitext(ruta_reporte)[0] + SUFIJO_INDICE
+
+def nombre_primera_hoja(ruta):
+    wb = openpyxl.load_workbook(ruta, read_only=True)
+    try: return wb.sheetnames[0]
+    finally: wb.close()
+
+
+class IndiceProcedencia:
+    """
+    Renglones de origen por cuenta: hoja y rango [inicio, fin) de filas del Excel (1-based).
+    Los rangos se guardan en arreglos int32 y las filas crudas en un solo DataFrame,
+    así que consultar los movimientos de una cuenta es un dict lookup + un slice.
+    """
+
+    def __init__(self, archivo, hoja, cuentas, inicio, fin, filas, fila_base):
+        self.archivo = archivo
+        self.hoja = hoja
+        self.cuentas = np.asarray(cuentas, dtype=object)
+        self.inicio = np.asarray(inicio, dtype=np.int32)
+        self.fin = np.asarray(fin, dtype=np.int32)
+        self.filas = filas
+        self.fila_base = fila_base
+        self._pos = {}
+        for i, c in enumerate(self.cuentas):
+            self._pos.setdefault(str(c).strip(), i)
+
+    @classmethod
+    def desde_posiciones(cls, archivo, filas, posiciones, cuentas, fila_base):
+        """
+        `posiciones`: índice (0-based en `filas`) del renglón donde empieza cada cuenta, en orden.
+        Cada cuenta abarca hasta el inicio de la siguiente. `fila_base` = fila Excel de filas.iloc[0].
+        """
+        pos = np.asarray(posiciones, dtype=np.int64)
+        fin = np.append(pos[1:], len(filas))
+        filas = filas.set_axis(np.arange(len(filas)) + fila_base)
+        return cls(archivo, nombre_primera_hoja(archivo), cuentas, pos + fila_base, fin + fila_base, filas, fila_base)
+
+    def rango(self, cuenta):
+        i = self._pos.get(str(cuenta).strip())
+        if i is None: return None
+        return self.hoja, int(self.inicio[i]), int(self.fin[i])
+
+    def movimientos(self, cuenta):
+        """Renglones de origen de la cuenta (incluye su renglón de título), con la fila Excel como índice."""
+        i = self._pos.get(str(cuenta).strip())
+        if i is None: return self.filas.iloc[0:0]
+        return self.filas.iloc[self.inicio[i] - self.fila_base:self.fin[i] - self.fila_base]
+
+    def anotar(self, cuentas, prefijo):
+        """Columnas de procedencia (Hoja, Fila_Ini, Fila_Fin) para una serie de cuentas."""
+        idx = np.array([self._pos.get(str(c).strip(), -1) for c in cuentas], dtype=np.int64)
+        hay = idx >= 0
+        idx[~hay] = 0
+        ini = pd.array(self.inicio[idx] if len(self.inicio) else np.zeros(len(idx)), dtype='Int32')
+        fin = pd.array(self.fin[idx] if len(self.fin) else np.zeros(len(idx)), dtype='Int32')
+        ini[~hay] = pd.NA; fin[~hay] = pd.NA
+        hoja = pd.Categorical(np.where(hay, self.hoja, None), categories=[self.hoja])
+        return pd.DataFrame({f'{prefijo}_Hoja': hoja, f'{prefijo}_Fila_Ini': ini, f'{prefijo}_Fila_Fin': fin}, index=cuentas.index)
+
+    def guardar(self, ruta):
+        with open(ruta, 'wb') as f:
+            pickle.dump({
+                'archivo': self.archivo, 'hoja': self.hoja, 'cuentas': self.cuentas,
+                'inicio': self.inicio, 'fin': self.fin, 'filas': self.filas, 'fila_base': self.fila_base
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def cargar(cls, ruta):
+        if not os.path.exists(ruta): return None
+        with open(ruta, 'rb') as f:
+            return cls(**pickle.load(f))
+
+
+_CACHE_INDICES = {}
+
+def movimientos_origen(cuenta, ruta_reporte):
+    """
+    Drill-down: renglones del archivo fuente detrás de una cuenta de un reporte intermedio
+    (Reporte_Contable_Final.xlsx o COI_Final_SumaCorrecta.xlsx), sin volver a leer el Excel.
+    """
+    ruta = ruta_indice(ruta_reporte)
+    llave = (os.path.abspath(ruta), os.path.getmtime(ruta))
+    if llave not in _CACHE_INDICES:
+        _CACHE_INDICES[llave] = IndiceProcedencia.cargar(ruta)
+    return _CACHE_INDICES[llave].movimientos(cuenta)
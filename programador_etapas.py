@@ -0,0 +1,109 @@
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# --- CONFIGURACIÓN ---
+# Cada etapa declara qué archivos lee y cuáles produce ({parámetro de la función: archivo});
+# las dependencias salen de ahí y las rutas se le pasan a la función tal cual.
+ETAPAS = {
+    'odoo': {
+        'modulo': 'libro_mayor_plano', 'funcion': 'procesar_contabilidad',
+        'entradas': {'ruta': 'libro_mayor_dic.xlsx'}, 'salidas': {'salida': 'Reporte_Contable_Final.xlsx'},
+    },
+    'coi': {
+        'modulo': 'clean_coi', 'funcion': 'procesar_coi_final',
+        'entradas': {'ruta': 'aux_coi_dic.xlsx'}, 'salidas': {'salida': 'COI_Final_SumaCorrecta.xlsx'},
+    },
+    'conciliacion': {
+        'modulo': 'conciliacion_coi', 'funcion': 'generar_analisis_v18_7',
+        # Los saldos en moneda original llegan en la hoja Divisa del reporte Odoo (ya no se relee el libro mayor)
+        'entradas': {'ruta_odoo': 'Reporte_Contable_Final.xlsx', 'ruta_coi': 'COI_Final_SumaCorrecta.xlsx',
+                     'ruta_tipos_cambio': 'tipos_cambio.csv'},
+        'salidas': {'salida': 'Analisis_Comparativo_Diciembre_V18_7.xlsx'},
+    },
+}
+
+
+def resolver_dependencias(etapas):
+    """{etapa: set(etapas de las que depende)}; una etapa depende de quien produce alguna de sus entradas."""
+    productor = {}
+    for nombre, e in etapas.items():
+        for s in e['salidas'].values():
+            if s in productor:
+                raise ValueError(f"'{s}' lo producen '{productor[s]}' y '{nombre}'")
+            productor[s] = nombre
+    return {n: {productor[f] for f in e['entradas'].values() if f in productor} for n, e in etapas.items()}
+
+def orden_topologico(deps):
+    orden, pendientes = [], {n: set(d) for n, d in deps.items()}
+    while pendientes:
+        listas = sorted(n for n, d in pendientes.items() if not d)
+        if not listas:
+            raise ValueError(f"Ciclo entre etapas: {sorted(pendientes)}")
+        for n in listas:
+            orden.append(n)
+            del pendientes[n]
+        for d in pendientes.values():
+            d.difference_update(listas)
+    return orden
+
+def ruta_critica(deps, duraciones):
+    """Camino más largo (por duración) del grafo: es el piso del tiempo de reloj de un cierre."""
+    acumulado, previo = {}, {}
+    for n in orden_topologico(deps):
+        mejor = max(deps[n], key=lambda d: acumulado[d], default=None)
+        acumulado[n] = duraciones[n] + (acumulado[mejor] if mejor else 0.0)
+        previo[n] = mejor
+
+    fin = max(acumulado, key=acumulado.get)
+    camino = [fin]
+    while previo[camino[-1]]:
+        camino.append(previo[camino[-1]])
+    return camino[::-1], acumulado[fin]
+
+def _ejecutar_etapa(modulo, funcion, rutas):
+    """Corre dentro del proceso trabajador; regresa marcas de tiempo de reloj."""
+    inicio = time.time()
+    # Las etapas reportan sus errores con print y regresan None: eso también es una falla
+    if getattr(importlib.import_module(modulo), funcion)(**rutas) is None:
+        raise RuntimeError(f"{modulo}.{funcion} no generó resultado")
+    return inicio, time.time()
+
+def ejecutar_cierre(etapas=ETAPAS, max_workers=None):
+    print(f"--- Ejecutando cierre: {', '.join(etapas)} ---")
+    deps = resolver_dependencias(etapas)
+    orden_topologico(deps)  # valida que no haya ciclos antes de lanzar procesos
+
+    tiempos, en_curso, terminadas = {}, {}, set()
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=max_workers or min(len(etapas), os.cpu_count() or 1)) as pool:
+        while len(terminadas) < len(etapas):
+            for n in etapas:
+                if n not in terminadas and n not in en_curso.values() and deps[n] <= terminadas:
+                    e = etapas[n]
+                    fut = pool.submit(_ejecutar_etapa, e['modulo'], e['funcion'], {**e['entradas'], **e['salidas']})
+                    en_curso[fut] = n
+
+            listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for fut in listos:
+                n = en_curso.pop(fut)
+                try:
+                    tiempos[n] = fut.result()
+                except Exception as e:
+                    for f in en_curso: f.cancel()
+                    raise RuntimeError(f"Falló la etapa '{n}': {e}") from e
+                terminadas.add(n)
+    total = time.time() - t0
+
+    duraciones = {n: fin - ini for n, (ini, fin) in tiempos.items()}
+    camino, dur_camino = ruta_critica(deps, duraciones)
+
+    for n in orden_topologico(deps):
+        ini, fin = tiempos[n]
+        print(f"  {n:<15} {ini - t0:7.2f}s -> {fin - t0:7.2f}s  ({duraciones[n]:.2f}s)")
+    print(f"Ruta crítica: {' -> '.join(camino)} ({dur_camino:.2f}s) | Reloj total: {total:.2f}s")
+    return {'tiempos': tiempos, 'duraciones': duraciones, 'ruta_critica': camino, 'total': total}
+
+if __name__ == "__main__":
+    ejecutar_cierre()
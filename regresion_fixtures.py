@@ -0,0 +1,183 @@
+import argparse
+import importlib
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+# --- CONFIGURACIÓN ---
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+ENTRADAS = ['libro_mayor_dic.xlsx', 'aux_coi_dic.xlsx']
+
+# (nombre, módulo, función, archivo esperado, orden_libre)
+# orden_libre: el orden de renglones con el mismo 'Orden' no es estable en la conciliación,
+# así que ahí se comparan los renglones como conjunto.
+ETAPAS = [
+    ('odoo', 'libro_mayor_plano', 'procesar_contabilidad', 'Reporte_Contable_Final.xlsx', False),
+    ('coi', 'clean_coi', 'procesar_coi_final', 'COI_Final_SumaCorrecta.xlsx', False),
+    ('conciliacion', 'conciliacion_coi', 'generar_analisis_v18_7', 'Analisis_Comparativo_Diciembre_V18_7.xlsx', True),
+]
+
+FILE_HISTORIAL = os.path.join(REPO_DIR, 'historial_tiempos.json')
+UMBRAL_LENTITUD = 1.5   # Falla si una etapa tarda más de 1.5x su línea base
+HOLGURA_SEG = 0.25      # Tolerancia absoluta para que el ruido en etapas cortas no dispare la alarma
+VENTANA_BASE = 5        # Corridas previas (mediana) que forman la línea base
+MAX_DIFS_REPORTE = 10
+
+
+# --- COMPARACIÓN ---
+def normalizar_hoja(df, orden_libre=False):
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].round(2)
+    df = df.fillna('').astype(str)
+    if orden_libre:
+        df = df.sort_values(list(df.columns)).reset_index(drop=True)
+    return df
+
+def comparar_excel(generado, esperado, orden_libre=False):
+    """Compara celda por celda (valores y estatus) todas las hojas. Regresa la lista de diferencias."""
+    difs = []
+    hojas_gen = pd.read_excel(generado, sheet_name=None, engine='openpyxl')
+    hojas_esp = pd.read_excel(esperado, sheet_name=None, engine='openpyxl')
+
+    if set(hojas_gen) != set(hojas_esp):
+        return [f"Hojas distintas: {sorted(hojas_gen)} vs {sorted(hojas_esp)}"]
+
+    for hoja, df_esp in hojas_esp.items():
+        df_gen = hojas_gen[hoja]
+        if list(df_gen.columns) != list(df_esp.columns):
+            difs.append(f"[{hoja}] Columnas distintas: {list(df_gen.columns)} vs {list(df_esp.columns)}")
+            continue
+        if df_gen.shape != df_esp.shape:
+            difs.append(f"[{hoja}] Tamaño distinto: {df_gen.shape} vs {df_esp.shape}")
+            continue
+
+        a, b = normalizar_hoja(df_gen, orden_libre), normalizar_hoja(df_esp, orden_libre)
+        distintos = (a != b)
+        for r, c in zip(*distintos.values.nonzero()):
+            difs.append(f"[{hoja}] fila {r + 2}, {a.columns[c]}: {a.iat[r, c]!r} != {b.iat[r, c]!r}")
+    return difs
+
+
+# --- HISTORIAL ---
+def cargar_historial(ruta=FILE_HISTORIAL):
+    if not os.path.exists(ruta): return []
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+def guardar_historial(historial, ruta=FILE_HISTORIAL):
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(historial, f, indent=2, ensure_ascii=False)
+
+def linea_base(historial, etapa, ventana=VENTANA_BASE):
+    tiempos = [h['tiempos'][etapa] for h in historial if etapa in h.get('tiempos', {})][-ventana:]
+    return statistics.median(tiempos) if tiempos else None
+
+
+# --- PROCESO ---
+def ejecutar_etapas(directorio):
+    """Corre las etapas en `directorio` (que ya tiene las entradas) y regresa los tiempos por etapa."""
+    tiempos = {}
+    cwd = os.getcwd()
+    if REPO_DIR not in sys.path: sys.path.insert(0, REPO_DIR)
+    try:
+        os.chdir(directorio)
+        for nombre, modulo, funcion, _, _ in ETAPAS:
+            fn = getattr(importlib.import_module(modulo), funcion)
+            t0 = time.perf_counter()
+            fn()
+            tiempos[nombre] = time.perf_counter() - t0
+    finally:
+        os.chdir(cwd)
+    return tiempos
+
+def comparar_motores(repeticiones=3):
+    """Corre las etapas Odoo y COI con cada motor, verifica que las salidas sean iguales y compara tiempos."""
+    print("--- Benchmark de motores (pandas vs polars) ---")
+    if REPO_DIR not in sys.path: sys.path.insert(0, REPO_DIR)
+    iguales = True
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix='motores_') as tmp:
+        for f in ENTRADAS:
+            shutil.copy(os.path.join(REPO_DIR, f), tmp)
+        os.chdir(tmp)
+        try:
+            for nombre, modulo, funcion, salida, orden_libre in ETAPAS[:2]:
+                fn = getattr(importlib.import_module(modulo), funcion)
+                tiempos = {}
+                for motor in ('pandas', 'polars'):
+                    corridas = []
+                    for _ in range(repeticiones):
+                        t0 = time.perf_counter()
+                        fn(motor=motor)
+                        corridas.append(time.perf_counter() - t0)
+                    tiempos[motor] = min(corridas)
+                    shutil.copy(salida, f"{motor}_{salida}")
+
+                difs = comparar_excel(f"polars_{salida}", f"pandas_{salida}", orden_libre)
+                iguales &= not difs
+                for d in difs[:MAX_DIFS_REPORTE]: print(f"   {d}")
+                print(f"[{'OK' if not difs else 'DIF'}] {nombre}: pandas {tiempos['pandas']:.3f}s | "
+                      f"polars {tiempos['polars']:.3f}s ({tiempos['pandas'] / tiempos['polars']:.1f}x)")
+        finally:
+            os.chdir(cwd)
+    return iguales
+
+def correr_regresion(umbral=UMBRAL_LENTITUD, registrar=True):
+    print("--- Regresión sobre fixtures de Diciembre ---")
+    fallas = []
+
+    with tempfile.TemporaryDirectory(prefix='regresion_') as tmp:
+        for f in ENTRADAS:
+            shutil.copy(os.path.join(REPO_DIR, f), tmp)
+
+        tiempos = ejecutar_etapas(tmp)
+
+        # 1. Salidas semánticamente idénticas
+        for nombre, _, _, esperado, orden_libre in ETAPAS:
+            difs = comparar_excel(os.path.join(tmp, esperado), os.path.join(REPO_DIR, esperado), orden_libre)
+            if difs:
+                fallas.append(f"{nombre}: {len(difs)} diferencias contra {esperado}")
+                for d in difs[:MAX_DIFS_REPORTE]: print(f"   {d}")
+            else:
+                print(f"[OK] {nombre}: {esperado} idéntico")
+
+    # 2. Tiempos contra la línea base
+    historial = cargar_historial()
+    for nombre, seg in tiempos.items():
+        base = linea_base(historial, nombre)
+        if base is None:
+            print(f"[--] {nombre}: {seg:.3f}s (sin línea base)")
+            continue
+        limite = base * umbral + HOLGURA_SEG
+        marca = "OK" if seg <= limite else "LENTO"
+        print(f"[{marca}] {nombre}: {seg:.3f}s (base {base:.3f}s, límite {limite:.3f}s)")
+        if seg > limite:
+            fallas.append(f"{nombre}: {seg:.3f}s excede {umbral}x la línea base ({base:.3f}s)")
+
+    # 3. Solo las corridas sanas alimentan la línea base
+    if registrar and not fallas:
+        historial.append({'fecha': datetime.now().isoformat(timespec='seconds'), 'tiempos': tiempos})
+        guardar_historial(historial)
+
+    for f in fallas: print(f"FALLA: {f}")
+    return not fallas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regresión de salidas y tiempos sobre los fixtures de Diciembre")
+    parser.add_argument('--umbral', type=float, default=UMBRAL_LENTITUD, help="Factor máximo de lentitud contra la línea base")
+    parser.add_argument('--no-registrar', action='store_true', help="No agrega la corrida al historial")
+    parser.add_argument('--motores', action='store_true', help="Compara los motores pandas y polars en lugar de la regresión")
+    args = parser.parse_args()
+    if args.motores:
+        sys.exit(0 if comparar_motores() else 1)
+    sys.exit(0 if correr_regresion(args.umbral, not args.no_registrar) else 1)
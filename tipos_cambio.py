@@ -0,0 +1,156 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from libro_mayor_plano import HOJA_DIVISA
+
+# --- CONFIGURACIÓN ---
+# Columnas: Fecha (AAAA-MM-DD), Moneda, Tipo_Cambio (MXN por unidad) y, opcional, Sistema ('odoo'/'coi'):
+# el tipo con el que ese sistema valúa. Sin Sistema el tipo aplica a ambos. Si un saldo ME se obtiene
+# dividiendo el MXN entre el tipo, conviene publicarlo con 6 decimales (DOF) para no perder centavos.
+FILE_TIPOS_CAMBIO = 'tipos_cambio.csv'
+FECHA_CORTE_ODOO = '2025-12-31'
+FECHA_CORTE_COI = '2025-12-31'
+TOLERANCIA_ME = 0.01   # Un centavo de la moneda original
+TOLERANCIA_MXN = 0.1   # Misma tolerancia que el estatus OK de la conciliación
+
+# Prefijo de cuenta -> moneda original
+CUENTAS_MONEDA_EXTRANJERA = {
+    'odoo': {'102.02': 'USD', '105.02': 'USD'},
+    'coi': {'1121': 'USD', '1122': 'USD', '1150-002': 'USD', '1150-003': 'USD'},
+}
+# Cuentas que ambos sistemas llevan en moneda original: su saldo ya es ME (p.ej. BBVA USD)
+CUENTAS_EN_DIVISA = {'odoo': ['102.02.01'], 'coi': ['1121']}
+# Complementos cambiarios: solo guardan la revaluación en MXN, no tienen saldo en ME
+CUENTAS_COMPLEMENTO = {'odoo': ['102.02.02'], 'coi': ['1122']}
+
+
+# --- TIPOS DE CAMBIO ---
+@lru_cache(maxsize=None)
+def _leer_tabla(ruta, mtime):
+    tabla = pd.read_csv(ruta, parse_dates=['Fecha'])
+    tabla['Moneda'] = tabla['Moneda'].astype(str).str.strip().str.upper()
+    tabla['Tipo_Cambio'] = pd.to_numeric(tabla['Tipo_Cambio'], errors='coerce')
+    tabla['Sistema'] = tabla['Sistema'].fillna('').astype(str).str.strip().str.lower() if 'Sistema' in tabla else ''
+    return tabla.dropna(subset=['Fecha', 'Tipo_Cambio']).sort_values('Fecha').reset_index(drop=True)
+
+@lru_cache(maxsize=None)
+def _tipos_del_periodo(ruta, mtime, periodo):
+    tabla = _leer_tabla(ruta, mtime)
+    fin = pd.Period(periodo, freq='M').end_time
+    return tabla[tabla['Fecha'] <= fin]
+
+def tipos_del_periodo(ruta, periodo):
+    """Tipos de cambio publicados hasta el cierre de `periodo` ('AAAA-MM'), cacheados por ruta, mtime y periodo."""
+    return _tipos_del_periodo(os.path.abspath(ruta), os.path.getmtime(ruta), periodo)
+
+
+# --- SALDOS EN MONEDA ORIGINAL (Odoo) ---
+def saldos_divisa_odoo(ruta_odoo):
+    """Saldo ME por cuenta de la hoja Divisa del reporte aplanado (vacío si el reporte no la trae)."""
+    try:
+        hoja = pd.read_excel(ruta_odoo, sheet_name=HOJA_DIVISA, dtype={'Cuenta': str}, engine='openpyxl')
+    except ValueError:
+        return pd.Series(dtype=float)
+    return hoja.set_index(hoja['Cuenta'].str.strip())['Saldo_Divisa']
+
+
+# --- VALUACIÓN ---
+def _por_prefijo(cuentas, prefijos):
+    cuentas = cuentas.fillna('').astype(str).str.strip().str.upper()
+    return np.logical_or.reduce([cuentas.str.startswith(p) for p in prefijos]) if prefijos else np.zeros(len(cuentas), bool)
+
+def moneda_de_cuentas(cuentas, sistema):
+    """Moneda original por cuenta (vectorizado por prefijo); '' si es cuenta en MXN."""
+    cuentas = cuentas.fillna('').astype(str).str.strip().str.upper()
+    prefijos = CUENTAS_MONEDA_EXTRANJERA[sistema]
+    return pd.Series(
+        np.select([cuentas.str.startswith(p) for p in prefijos], list(prefijos.values()), default=''),
+        index=cuentas.index
+    )
+
+def valuar_moneda_extranjera(df_fin, saldos_me, ruta=FILE_TIPOS_CAMBIO,
+                             fecha_odoo=FECHA_CORTE_ODOO, fecha_coi=FECHA_CORTE_COI):
+    """
+    Concilia cuenta por cuenta en moneda original.
+    - Saldo ME: el saldo mismo si la cuenta se lleva en divisa; en Odoo, el de `saldos_me` (columna Divisa
+      del libro); si no, el saldo MXN entre el tipo con el que valúa cada sistema.
+    - Ambos saldos ME se revalúan al mismo tipo (el genérico a la fecha de corte más reciente): la
+      diferencia MXN que desaparece es el efecto cambiario.
+    "SOLO TC": saldos ME iguales con diferencia en MXN, siempre que los dos ME no salgan del mismo tipo
+    (ahí la igualdad ME es la misma diferencia MXN). Renglones agregados, sumas virtuales y complementos
+    cambiarios no se comparan. Regresa solo los renglones en moneda extranjera.
+    """
+    moneda = moneda_de_cuentas(df_fin['Odoo_Cta'], 'odoo')
+    moneda = moneda.where(moneda != '', moneda_de_cuentas(df_fin['COI_Cta'], 'coi'))
+
+    comparable = (
+        (moneda != '') & (df_fin['Odoo_Cta'].astype(str).str.count(r'\.') != 1) &
+        ~df_fin['COI_Cta'].astype(str).str.startswith('SUMA') &
+        ~_por_prefijo(df_fin['Odoo_Cta'], CUENTAS_COMPLEMENTO['odoo']) &
+        ~_por_prefijo(df_fin['COI_Cta'], CUENTAS_COMPLEMENTO['coi'])
+    )
+    me = df_fin[comparable].copy()
+    if me.empty: return me
+    me['Moneda'] = moneda[comparable]
+
+    f_odoo, f_coi = pd.Timestamp(fecha_odoo), pd.Timestamp(fecha_coi)
+    f_val = max(f_odoo, f_coi)
+    tabla = tipos_del_periodo(ruta, f_val.strftime('%Y-%m'))
+
+    # Tipos por lado: los genéricos aplican a todos; los de un sistema solo a ese y, en la misma fecha, ganan
+    lados = {'Odoo': (f_odoo, ['', 'odoo']), 'COI': (f_coi, ['', 'coi']), 'Valuacion': (f_val, [''])}
+    por_lado = pd.concat([
+        tabla[tabla['Sistema'].isin(sistemas)].assign(Lado=lado) for lado, (_, sistemas) in lados.items()
+    ]).assign(Especifico=lambda t: t['Sistema'] != '').sort_values(['Fecha', 'Especifico'], kind='stable')
+
+    # Un solo as-of merge para todos los lados de todas las cuentas
+    n = len(me)
+    consultas = pd.DataFrame({
+        'Renglon': np.tile(np.arange(n), len(lados)),
+        'Lado': np.repeat(list(lados), n),
+        'Moneda': np.tile(me['Moneda'].to_numpy(), len(lados)),
+        'Fecha': np.repeat([f for f, _ in lados.values()], n),
+    }).sort_values('Fecha', kind='stable')
+    consultas = pd.merge_asof(consultas, por_lado[['Fecha', 'Moneda', 'Lado', 'Tipo_Cambio']],
+                              on='Fecha', by=['Moneda', 'Lado'], direction='backward')
+    tc = consultas.pivot(index='Renglon', columns='Lado', values='Tipo_Cambio').reindex(np.arange(n))
+    me['TC_Odoo'] = tc['Odoo'].to_numpy()
+    me['TC_COI'] = tc['COI'].to_numpy()
+    me['TC_Valuacion'] = tc['Valuacion'].fillna(tc['Odoo']).to_numpy()
+
+    odoo_saldo = pd.to_numeric(me['Odoo_Saldo'], errors='coerce')
+    coi_saldo = pd.to_numeric(me['COI_Saldo'], errors='coerce')
+    odoo_div = _por_prefijo(me['Odoo_Cta'], CUENTAS_EN_DIVISA['odoo'])
+    coi_div = _por_prefijo(me['COI_Cta'], CUENTAS_EN_DIVISA['coi'])
+    con_divisa = me['Odoo_Cta'].map(saldos_me)
+
+    me['Odoo_Saldo_ME'] = np.where(odoo_div, odoo_saldo, con_divisa.fillna(odoo_saldo / me['TC_Odoo']))
+    me['Odoo_Origen_ME'] = np.select([odoo_div, con_divisa.notna()], ['CUENTA EN DIVISA', 'COLUMNA DIVISA'], default='SALDO / TC')
+    me['COI_Saldo_ME'] = np.where(coi_div, coi_saldo, coi_saldo / me['TC_COI'])
+    me['COI_Origen_ME'] = np.where(coi_div, 'CUENTA EN DIVISA', 'SALDO / TC')
+    me['Diff_ME'] = me['Odoo_Saldo_ME'].abs() - me['COI_Saldo_ME'].abs()
+
+    # Diferencia en libros (MXN) vs diferencia con ambos ME al mismo tipo
+    odoo_mxn = np.where(odoo_div, me['Odoo_Saldo_ME'] * me['TC_Odoo'], odoo_saldo)
+    coi_mxn = np.where(coi_div, me['COI_Saldo_ME'] * me['TC_COI'], coi_saldo)
+    me['Diff_MXN'] = np.abs(odoo_mxn) - np.abs(coi_mxn)
+    me['Odoo_Valuado_MXN'] = me['Odoo_Saldo_ME'] * me['TC_Valuacion']
+    me['COI_Valuado_MXN'] = me['COI_Saldo_ME'] * me['TC_Valuacion']
+    me['Diff_Valuado_MXN'] = me['Odoo_Valuado_MXN'].abs() - me['COI_Valuado_MXN'].abs()
+    me['Efecto_TC'] = me['Diff_MXN'] - me['Diff_Valuado_MXN']
+
+    mismo_tc = (me['Odoo_Origen_ME'] == 'SALDO / TC') & (me['COI_Origen_ME'] == 'SALDO / TC') & (me['TC_Odoo'] == me['TC_COI'])
+    me['Status_ME'] = np.select(
+        [me[['TC_Odoo', 'TC_COI']].isna().any(axis=1),
+         me['Diff_ME'].abs() >= TOLERANCIA_ME,
+         me['Diff_MXN'].abs() < TOLERANCIA_MXN,
+         mismo_tc],
+        ['SIN TIPO DE CAMBIO', 'DIFERENCIA ME', 'OK', 'DIFERENCIA MXN'],
+        default='SOLO TC'
+    )
+    # Sin contraparte (huérfanas / NO EN COI) no hay nada que conciliar
+    me.loc[odoo_saldo.isna() | coi_saldo.isna(), ['Odoo_Origen_ME', 'COI_Origen_ME', 'Status_ME']] = ''
+    return me
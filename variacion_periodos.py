@@ -0,0 +1,155 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from conciliacion_coi import safe_write_money
+
+# --- CONFIGURACIÓN ---
+# Periodos en orden cronológico: {etiqueta: Analisis_Comparativo_*.xlsx o DataFrame de generar_analisis_v18_7}
+PERIODOS = {
+    # 'Nov': 'Analisis_Comparativo_Noviembre_V18_7.xlsx',
+    'Dic': 'Analisis_Comparativo_Diciembre_V18_7.xlsx',
+}
+FILE_OUTPUT = 'Variacion_Periodos.xlsx'
+TOLERANCIA = 0.01
+
+# Encabezados del Excel de conciliación -> columnas internas de generar_analisis_v18_7
+COLUMNAS_CONCILIACION = {
+    'Odoo Cta': 'Odoo_Cta', 'Odoo Desc': 'Odoo_Desc', 'Odoo Saldo': 'Odoo_Saldo',
+    'COI Cta': 'COI_Cta', 'COI Desc': 'COI_Desc', 'COI Saldo': 'COI_Saldo',
+    'Diff': 'Diff', 'Estatus': 'Status'
+}
+CLAVE = ['Odoo_Cta', 'COI_Cta', 'Ocurrencia']
+
+# Cada workbook se lee una sola vez por (ruta, fecha de modificación); solo se guarda la versión
+# más reciente de cada ruta y, a lo más, MAX_CACHE rutas
+MAX_CACHE = 8
+_CACHE_CONCILIACIONES = OrderedDict()
+
+
+def cargar_conciliacion(origen):
+    """
+    Normaliza una conciliación (ruta o DataFrame) a las columnas internas con clave de join.
+    Un DataFrame ya normalizado (con 'Ocurrencia') se regresa tal cual. Desde ruta se regresa
+    una copia, así que modificarla no altera el caché.
+    """
+    if isinstance(origen, pd.DataFrame):
+        if 'Ocurrencia' in origen.columns: return origen
+        df = origen.rename(columns=COLUMNAS_CONCILIACION)
+    else:
+        ruta = os.path.abspath(origen)
+        mtime = os.path.getmtime(ruta)
+        if ruta in _CACHE_CONCILIACIONES and _CACHE_CONCILIACIONES[ruta][0] == mtime:
+            _CACHE_CONCILIACIONES.move_to_end(ruta)
+            return _CACHE_CONCILIACIONES[ruta][1].copy()
+        df = pd.read_excel(ruta, sheet_name='Conciliacion', engine='openpyxl').rename(columns=COLUMNAS_CONCILIACION)
+
+    df = df[list(COLUMNAS_CONCILIACION.values())].copy()
+    for col in ['Odoo_Cta', 'COI_Cta', 'Odoo_Desc', 'COI_Desc', 'Status']:
+        df[col] = df[col].fillna('').astype(str).str.strip()
+    for col in ['Odoo_Saldo', 'COI_Saldo']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Una misma pareja de cuentas puede repetirse (p.ej. renglones de cálculo sin cuenta)
+    df['Ocurrencia'] = df.groupby(['Odoo_Cta', 'COI_Cta']).cumcount()
+
+    if not isinstance(origen, pd.DataFrame):
+        _CACHE_CONCILIACIONES[ruta] = (mtime, df)
+        _CACHE_CONCILIACIONES.move_to_end(ruta)
+        while len(_CACHE_CONCILIACIONES) > MAX_CACHE:
+            _CACHE_CONCILIACIONES.popitem(last=False)
+        return df.copy()
+    return df
+
+def comparar_periodos(actual, anterior):
+    """
+    Hash-join de dos conciliaciones sobre (Odoo_Cta, COI_Cta).
+    Regresa deltas de saldo, transición de estatus y cuentas nuevas/desaparecidas.
+    """
+    act, ant = cargar_conciliacion(actual), cargar_conciliacion(anterior)
+    m = ant.merge(act, on=CLAVE, how='outer', suffixes=('_Ant', '_Act'), indicator=True)
+
+    res = m[['Odoo_Cta', 'COI_Cta']].copy()
+    res['Odoo_Desc'] = m['Odoo_Desc_Act'].where(m['_merge'] != 'left_only', m['Odoo_Desc_Ant'])
+    res['COI_Desc'] = m['COI_Desc_Act'].where(m['_merge'] != 'left_only', m['COI_Desc_Ant'])
+    for lado in ['Odoo', 'COI']:
+        res[f'{lado}_Saldo_Ant'] = m[f'{lado}_Saldo_Ant']
+        res[f'{lado}_Saldo_Act'] = m[f'{lado}_Saldo_Act']
+        res[f'Delta_{lado}'] = m[f'{lado}_Saldo_Act'].fillna(0) - m[f'{lado}_Saldo_Ant'].fillna(0)
+    res['Status_Ant'] = m['Status_Ant'].fillna('')
+    res['Status_Act'] = m['Status_Act'].fillna('')
+
+    cambio_st = (m['_merge'] == 'both') & (res['Status_Ant'] != res['Status_Act'])
+    res['Transicion'] = np.where(cambio_st, res['Status_Ant'] + " -> " + res['Status_Act'], '')
+
+    varia = (res['Delta_Odoo'].abs() > TOLERANCIA) | (res['Delta_COI'].abs() > TOLERANCIA)
+    res['Movimiento'] = np.select(
+        [m['_merge'] == 'right_only', m['_merge'] == 'left_only', cambio_st, varia],
+        ['NUEVA', 'DESAPARECIDA', 'CAMBIO ESTATUS', 'VARIACION'],
+        default='SIN CAMBIO'
+    )
+
+    # Huérfanas COI ("NO EN ELISA") que aparecen o se resuelven
+    era_h, es_h = res['Status_Ant'] == "NO EN ELISA", res['Status_Act'] == "NO EN ELISA"
+    res['Huerfana'] = np.select([es_h & ~era_h, era_h & ~es_h], ['APARECE', 'SE RESUELVE'], default='')
+    return res
+
+def comparar_serie(periodos):
+    """
+    Compara cada periodo contra el anterior ({etiqueta: origen} en orden cronológico).
+    Cada conciliación se carga una sola vez aunque participe en dos comparaciones.
+    """
+    etiquetas = list(periodos)
+    cargadas = {p: cargar_conciliacion(periodos[p]) for p in etiquetas}
+
+    partes = []
+    for ant, act in zip(etiquetas, etiquetas[1:]):
+        res = comparar_periodos(cargadas[act], cargadas[ant])
+        res.insert(0, 'Periodo', act)
+        res.insert(1, 'Periodo_Anterior', ant)
+        partes.append(res)
+    if not partes: return pd.DataFrame()
+    return pd.concat(partes, ignore_index=True)
+
+def generar_reporte_variacion(periodos=PERIODOS):
+    print(f"--- Variación entre periodos: {', '.join(periodos)} ---")
+    if len(periodos) < 2:
+        print("Se necesitan al menos dos periodos para comparar.")
+        return
+
+    df = comparar_serie(periodos)
+    df = df[df['Movimiento'] != 'SIN CAMBIO']
+    resumen = pd.crosstab([df['Periodo_Anterior'], df['Periodo']], df['Movimiento']).reset_index()
+
+    writer = pd.ExcelWriter(FILE_OUTPUT, engine='xlsxwriter')
+    resumen.to_excel(writer, index=False, sheet_name='Resumen')
+    wb, ws = writer.book, writer.book.add_worksheet('Variacion')
+
+    f_hdr = wb.add_format({'bg_color': '#D9D9D9', 'bold': True, 'border': 1, 'align': 'center'})
+    f_std = wb.add_format({'border': 1}); f_std_m = wb.add_format({'border': 1, 'num_format': '$ #,##0.00'})
+    f_nueva = wb.add_format({'border': 1, 'bg_color': '#C6EFCE'})
+    f_desap = wb.add_format({'border': 1, 'bg_color': '#FFC7CE'})
+    f_cambio = wb.add_format({'border': 1, 'bg_color': '#F5CC27', 'bold': True})
+
+    columnas = ['Periodo', 'Odoo_Cta', 'COI_Cta', 'Odoo_Desc', 'Odoo_Saldo_Ant', 'Odoo_Saldo_Act', 'Delta_Odoo',
+                'COI_Saldo_Ant', 'COI_Saldo_Act', 'Delta_COI', 'Movimiento', 'Transicion', 'Huerfana']
+    for c, h in enumerate(columnas):
+        ws.write(0, c, h.replace('_', ' '), f_hdr)
+
+    estilo = {'NUEVA': f_nueva, 'DESAPARECIDA': f_desap, 'CAMBIO ESTATUS': f_cambio}
+    for i, r in enumerate(df[columnas].to_dict('records')):
+        row_idx = i + 1
+        fr = estilo.get(r['Movimiento'], f_std)
+        for c, col in enumerate(columnas):
+            if 'Saldo' in col or 'Delta' in col: safe_write_money(ws, row_idx, c, r[col], f_std_m)
+            else: ws.write(row_idx, c, r[col], fr)
+
+    ws.set_column('B:C', 15); ws.set_column('D:D', 45); ws.set_column('E:J', 15); ws.set_column('K:M', 20)
+    writer.close()
+    print(f"¡Listo! Variación generada: {FILE_OUTPUT}")
+    return df
+
+if __name__ == "__main__":
+    generar_reporte_variacion()